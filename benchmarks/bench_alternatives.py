@@ -0,0 +1,51 @@
+# 替代路徑（懲罰法）的延遲與 k 的關係，兩種權重、三種距離分組：
+# python benchmarks/bench_alternatives.py [pkl] [artifact] [--pairs N] [--k 1 2 3 5 8]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import routing  # noqa: E402
+from bench_suite import generate_od  # noqa: E402
+from routing.alternatives import overlap  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--pairs", type=int, default=20, help="每組起訖點數")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 2, 3, 5, 8])
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, args.artifact)
+    od = generate_od(G, args.pairs, args.seed)
+    pairs = {name: [(routing.find_nearest_node(G, a, b, np.inf), routing.find_nearest_node(G, c, d, np.inf))
+                    for a, b, c, d in rows] for name, rows in od.items()}
+    for weight in routing.WEIGHTS:
+        for name, rows in pairs.items():
+            if not rows:
+                continue
+            for k in args.k:
+                times, found, shared = [], [], []
+                for s, t in rows:
+                    t0 = time.perf_counter()
+                    routes = routing.alternative_routes(G, s, t, weight, k)
+                    times.append(time.perf_counter() - t0)
+                    found.append(len(routes))
+                    edges = [G.path_edges(path, weight) for path, _, _ in routes]
+                    # 每條替代路徑與最佳路徑共用的長度比例
+                    shared += [overlap(G, e, edges[0]) for e in edges[1:]]
+                ms = np.array(times) * 1000
+                print(f"{weight:>8} {name:>10} k={k}: p50 {np.percentile(ms, 50):8.1f} ms | "
+                      f"p90 {np.percentile(ms, 90):8.1f} ms | 平均找到 {np.mean(found):4.1f} 條 | "
+                      f"與最佳路徑重疊 {np.mean(shared) if shared else 0:5.1%}")
+
+
+if __name__ == "__main__":
+    main()
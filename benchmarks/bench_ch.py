@@ -0,0 +1,63 @@
+# 收縮階層與 Dijkstra 的查詢速度比較，並列出 SEARCH_MODE "auto" 會選哪一個：
+# python benchmarks/bench_ch.py [pkl] [artifact 資料夾] [--pairs N]
+# 成本正確性見 tests/test_ch.py
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import routing  # noqa: E402
+from routing.ch import build_ch, measure_speedup  # noqa: E402
+
+
+def path_cost(G, path, weight):
+    return G.weight_array(weight)[G.csr_edges(weight, path[:-1], path[1:])].sum()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, args.artifact)
+    for weight in routing.WEIGHTS:
+        if weight not in G.ch:
+            # 沒有預先建好時當場建立（不寫檔）
+            t0 = time.perf_counter()
+            G.ch[weight] = build_ch(G, weight)
+            G.ch[weight].speedup = measure_speedup(G, G.ch[weight], weight)
+            print(f"{weight:>8}: preprocessing {time.perf_counter() - t0:.1f} s")
+
+    rnd = random.Random(args.seed)
+    pairs = [tuple(rnd.sample(range(G.num_nodes), 2)) for _ in range(args.pairs)]
+    for weight in routing.WEIGHTS:
+        t_dij = t_ch = settled = 0.0
+        mismatches = 0
+        for s, t in pairs:
+            t0 = time.perf_counter()
+            expected, _ = routing.search(G, s, t, weight, "dijkstra")
+            t1 = time.perf_counter()
+            got, count = routing.search(G, s, t, weight, "ch")
+            t2 = time.perf_counter()
+            t_dij += t1 - t0
+            t_ch += t2 - t1
+            settled += count
+            if (expected is None) != (got is None):
+                mismatches += 1
+            elif expected is not None:
+                a, b = path_cost(G, expected, weight), path_cost(G, got, weight)
+                mismatches += abs(a - b) > 1e-9 * max(1.0, a)
+        n = len(pairs)
+        auto = "ch" if G.ch[weight].faster else "dijkstra"
+        print(f"{weight:>8}: dijkstra {t_dij / n * 1000:8.3f} ms/query | "
+              f"ch {t_ch / n * 1000:8.3f} ms/query ({settled / n:.0f} settled) | "
+              f"speedup {t_dij / t_ch:6.1f}x | cost mismatches {mismatches}/{n} | auto → {auto}")
+
+
+if __name__ == "__main__":
+    main()
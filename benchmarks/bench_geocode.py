@@ -0,0 +1,85 @@
+# 以本機模擬 geocoder 量測「路徑解算」與點地圖的端到端延遲，比較依序查詢與同時查詢：
+# python benchmarks/bench_geocode.py [pkl] [--trials N] [--delay 秒]
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import routing  # noqa: E402
+from mock_geocoder import MockGeocoder  # noqa: E402
+from routing.geocode import Geocoder  # noqa: E402
+from routing.graph import PKL_PATH  # noqa: E402
+
+
+def route(G, start, end):
+    # 模擬地址不一定落在路網附近，這裡不限制距離
+    s = G.index.nearest(*start, np.inf)
+    t = G.index.nearest(*end, np.inf)
+    for weight in ("length", "exposure"):
+        routing.compute_path(G, s, t, weight)
+
+
+def route_sequential(G, geocoder, start_address, end_address):
+    # 原本的流程：起點查完才查終點，再算路徑
+    start = geocoder.geocode(start_address)
+    end = geocoder.geocode(end_address)
+    route(G, start, end)
+
+
+def route_concurrent(G, geocoder, start_address, end_address):
+    futures = [geocoder.geocode_async(a) for a in (start_address, end_address)]
+    route(G, *(f.result() for f in futures))
+
+
+def report(label, times):
+    ms = sorted(t * 1000 for t in times)
+    p95 = ms[min(len(ms) - 1, int(0.95 * len(ms)))]
+    print(f"{label:>28}: 中位數 {statistics.median(ms):8.1f} ms | p95 {p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=PKL_PATH)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.2, help="模擬 API 每個請求的延遲（秒）")
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, None)
+    server = MockGeocoder(delay=args.delay).start()
+    # 不接快取，每次都打到模擬 API
+    geocoder = Geocoder(url=server.url)
+    print(f"模擬延遲 {args.delay * 1000:.0f} ms，{args.trials} 次")
+
+    for label, handler in (("路徑解算（依序查詢）", route_sequential),
+                           ("路徑解算（同時查詢）", route_concurrent)):
+        times = []
+        for i in range(args.trials):
+            G.route_cache.clear()
+            t0 = time.perf_counter()
+            handler(G, geocoder, f"{label}起點{i}", f"{label}終點{i}")
+            times.append(time.perf_counter() - t0)
+        report(label, times)
+
+    # 點地圖：原本在 rerun 前等反查結果，改為背景反查只需送出請求
+    lat, lon = G.latlon[0].tolist()
+    blocking, background = [], []
+    for i in range(args.trials):
+        t0 = time.perf_counter()
+        geocoder.reverse_geocode(lat + i * 1e-4, lon)
+        blocking.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        future = geocoder.reverse_geocode_async(lat + i * 1e-4, lon + 1e-4)
+        background.append(time.perf_counter() - t0)
+        future.result()
+    report("點地圖（等待反查）", blocking)
+    report("點地圖（背景反查）", background)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
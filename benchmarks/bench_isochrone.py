@@ -0,0 +1,69 @@
+# 等時圈與等暴露範圍的計算時間，分開列出有界 Dijkstra 與多邊形，預算越大範圍越大：
+# python benchmarks/bench_isochrone.py [pkl] [artifact] [--sources N] [--minutes 5 15 30 60] [--method hull]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import routing  # noqa: E402
+from routing.graph import compute_isochrone  # noqa: E402
+from routing.isochrone import (  # noqa: E402
+    ISO_METHOD,
+    ISO_METHODS,
+    exposure_budget,
+    isoexposure,
+    mode_distance,
+    reach,
+)
+from routing.stats import SPEEDS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[5, 15, 30, 60])
+    parser.add_argument("--method", choices=ISO_METHODS, default=ISO_METHOD)
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, args.artifact)
+    sources = np.random.default_rng(args.seed).integers(G.num_nodes, size=args.sources).tolist()
+    for mode in SPEEDS:
+        for minutes in args.minutes:
+            t_reach, t_total, t_cached, nodes, area = [], [], [], [], []
+            budget = mode_distance(mode, minutes)
+            for s in sources:
+                t0 = time.perf_counter()
+                reach(G, s, "length", budget)
+                t1 = time.perf_counter()
+                result = compute_isochrone(G, s, mode, minutes, args.method)
+                t2 = time.perf_counter()
+                compute_isochrone(G, s, mode, minutes, args.method)
+                t3 = time.perf_counter()
+                t_reach.append(t1 - t0)
+                t_total.append(t2 - t1)
+                t_cached.append(t3 - t2)
+                nodes.append(result["nodes"])
+                area.append(result["area_km2"])
+            print(f"{mode} {minutes:4.0f} min: {np.mean(nodes):7.0f} 節點 {np.mean(area):7.1f} km² | "
+                  f"Dijkstra {np.median(t_reach) * 1000:7.1f} ms | 總計 {np.median(t_total) * 1000:8.1f} ms"
+                  f" | 快取 {np.median(t_cached) * 1e6:5.0f} µs")
+
+    # 等暴露範圍：預算為平均濃度下單車走 minutes 分鐘的暴露量
+    for minutes in args.minutes:
+        budget = exposure_budget(G, "單車", minutes)
+        times = []
+        for s in sources:
+            t0 = time.perf_counter()
+            isoexposure(G, s, budget, args.method)
+            times.append(time.perf_counter() - t0)
+        print(f"等暴露（單車 {minutes:.0f} 分鐘份量 {budget:.1f}）: {np.median(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
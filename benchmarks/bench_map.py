@@ -0,0 +1,60 @@
+# 比較「每條邊一個 PolyLine」與「合併簡化後單一 PolyLine」的地圖 HTML 大小與繪製時間：
+# python benchmarks/bench_map.py [pkl] [--pairs N] [--zoom Z]
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import folium
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import routing  # noqa: E402
+from routing.graph import PKL_PATH  # noqa: E402
+
+STYLES = [("length", "blue", "最短路徑"), ("exposure", "#00d26a", "最低暴露路徑")]
+
+
+def per_edge_map(G, s, t):
+    m = folium.Map(location=[25.04, 121.56], zoom_start=13)
+    for weight, color, label in STYLES:
+        path = routing.compute_path(G, s, t, weight)[0]
+        for u, v in zip(path[:-1], path[1:]):
+            for e in G.edges_between(u, v):
+                folium.PolyLine(G.edge_latlon(e), color=color, weight=4, tooltip=label).add_to(m)
+    return m
+
+
+def merged_map(G, s, t, zoom):
+    m = folium.Map(location=[25.04, 121.56], zoom_start=13)
+    for weight, color, label in STYLES:
+        coords = routing.route_geometry(G, s, t, weight, zoom)
+        folium.PolyLine(coords, color=color, weight=4, tooltip=label).add_to(m)
+    return m
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=PKL_PATH)
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument("--zoom", type=int, default=13)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, None)
+    rnd = random.Random(args.seed)
+    pairs = [tuple(rnd.sample(range(G.num_nodes), 2)) for _ in range(args.pairs)]
+    for name, build in [("per-edge", per_edge_map),
+                        ("merged", lambda G, s, t: merged_map(G, s, t, args.zoom))]:
+        size = elapsed = 0
+        for s, t in pairs:
+            t0 = time.perf_counter()
+            html = build(G, s, t).get_root().render()
+            elapsed += time.perf_counter() - t0
+            size += len(html.encode("utf-8"))
+        n = len(pairs)
+        print(f"{name:>8}: {size / n / 1024:9.1f} KB/map | {elapsed / n * 1000:8.1f} ms/map")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# 分區載入與整張圖載入的比較：冷啟動、記憶體、短程與跨市區的路徑延遲，並檢查兩者成本一致：
+# python benchmarks/bench_partition.py [pkl] [artifact] [分區資料夾] [--pairs N]
+# 分區資料夾以 python -m routing.partition 產生
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import routing  # noqa: E402
+from bench_suite import generate_od  # noqa: E402
+from routing.memory import memory_usage  # noqa: E402
+from routing.partition import PARTITION_PATH  # noqa: E402
+
+# 子行程載入後算一條短程路徑，回報時間後等 stdin 關閉，讓父行程讀記憶體
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import routing
+net = routing.load_graph({pkl!r}, {artifact!r}, {partitions!r} if {partitioned!r} else None)
+t1 = time.perf_counter()
+routing.compute_path(net, {source}, {target}, "length")
+routing.compute_path(net, {source}, {target}, "exposure")
+t2 = time.perf_counter()
+cells = len(net.loaded_cells) if {partitioned!r} else None
+print(json.dumps({{"load_s": t1 - t0, "first_route_s": t2 - t1, "cells": cells}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def cold_start(args, partitioned, source, target):
+    code = CHILD.format(root=str(ROOT), partitioned=partitioned, partitions=args.partitions,
+                        pkl=args.pkl, artifact=args.artifact, source=source, target=target)
+    child = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE, text=True)
+    try:
+        result = json.loads(child.stdout.readline())
+        result.update(memory_usage(child.pid))
+    finally:
+        child.stdin.close()
+        child.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("partitions", nargs="?", default=PARTITION_PATH)
+    parser.add_argument("--pairs", type=int, default=20, help="每組起訖點數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not os.path.isfile(os.path.join(args.partitions, "meta.json")):
+        sys.exit(f"找不到分區資料夾 {args.partitions}，請先執行 "
+                 f"python -m routing.partition [pkl] {args.partitions} [--artifact 資料夾]")
+    G = routing.load_graph(args.pkl, args.artifact, partition_path=None)
+    od = generate_od(G, args.pairs, args.seed)
+    pairs = {name: [(G.index.nearest(a, b, np.inf), G.index.nearest(c, d, np.inf))
+                    for a, b, c, d in rows] for name, rows in od.items()}
+
+    # 冷啟動：只服務一小區（短程）時，分區版只需載入起訖點所在的分區
+    if pairs["short"]:
+        s, t = pairs["short"][0]
+        for name, partitioned in (("整張圖", False), ("分區", True)):
+            r = cold_start(args, partitioned, s, t)
+            cells = f" | 載入 {r['cells']} 個分區" if r["cells"] is not None else ""
+            print(f"{name:>6}: load {r['load_s'] * 1000:8.1f} ms | first route "
+                  f"{r['first_route_s'] * 1000:7.1f} ms | RSS {r['rss_mb']:7.1f} MB | "
+                  f"private {r.get('private_mb', 0):7.1f} MB{cells}")
+
+    # 延遲與正確性：每組起訖點各用新開的分區路網（含載入分區），另列分區已載入時的延遲
+    mismatches = 0
+    warm = routing.load_graph(partition_path=args.partitions)
+    for name, rows in pairs.items():
+        if not rows:
+            continue
+        t_mono, t_totals, t_warm, t_path, cells = [], [], [], [], []
+        for s, t in rows:
+            for weight in routing.WEIGHTS:
+                G.route_cache.clear()
+                t0 = time.perf_counter()
+                _, length, exposure = routing.compute_path(G, s, t, weight)
+                t_mono.append(time.perf_counter() - t0)
+                P = routing.load_graph(partition_path=args.partitions)
+                t0 = time.perf_counter()
+                totals = P.route_totals(s, t, weight)
+                t_totals.append(time.perf_counter() - t0)
+                cells.append(len(P.loaded_cells))
+                t0 = time.perf_counter()
+                path, _, _ = routing.compute_path(P, s, t, weight)
+                t_path.append(time.perf_counter() - t0)
+                # 分區都已載入後的查詢
+                warm.route_totals(s, t, weight)
+                warm.route_cache.clear()
+                t0 = time.perf_counter()
+                warm.route_totals(s, t, weight)
+                t_warm.append(time.perf_counter() - t0)
+                if totals is None or not np.allclose(totals, (length, exposure)):
+                    mismatches += 1
+                elif path != routing.compute_path(G, s, t, weight)[0]:
+                    mismatches += 1
+        print(f"{name:>10}: 整張圖 p50 {np.median(t_mono) * 1000:7.1f} ms | 分區總量 p50 "
+              f"{np.median(t_totals) * 1000:7.1f} ms（平均載入 {np.mean(cells):.1f} 區，已載入時 "
+              f"{np.median(t_warm) * 1000:.1f} ms）| "
+              f"展開路徑 p50 {np.median(t_path) * 1000:7.1f} ms")
+    print(f"成本不一致：{mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+# 全路網預先統計的吞吐量：不同行程數下每秒處理的起訖點組數，並檢查各行程數的結果一致：
+# python benchmarks/bench_precompute.py [pkl] [artifact] [--sources N] [--targets N] [--workers 1 2 4]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import routing  # noqa: E402
+from routing.precompute import TARGETS, run_precompute  # noqa: E402
+
+OUTPUTS = ["edge_usage_shortest", "edge_usage_lowexp", "zone_pair_count", "zone_pair_improve_sum"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--sources", type=int, default=256)
+    parser.add_argument("--targets", type=int, default=TARGETS)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"CPU 核心數：{os.cpu_count()}")
+    base, mismatches = None, 0
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as out_dir:
+            t0 = time.perf_counter()
+            pairs, _ = run_precompute(out_dir, args.sources, args.targets, workers=workers,
+                                      pkl_path=args.pkl, artifact_path=args.artifact)
+            elapsed = time.perf_counter() - t0
+            result = [np.load(os.path.join(out_dir, f"{name}.npy")) for name in OUTPUTS]
+        if base is None:
+            base = result
+        elif not all(np.allclose(a, b) for a, b in zip(base, result)):
+            mismatches += 1
+        print(f"workers {workers}: {pairs} 組 {elapsed:6.1f} s | {pairs / elapsed:8.0f} 組/s | "
+              f"{pairs * 2 / elapsed:8.0f} routes/s")
+    print(f"結果不一致：{mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
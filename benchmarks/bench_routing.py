@@ -0,0 +1,90 @@
+# 比較原本 networkx Dijkstra、CSR 路網引擎與各搜尋模式：
+# python benchmarks/bench_routing.py [pkl] [--pairs N]
+import argparse
+import pickle
+import random
+import sys
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from routing import SEARCH_MODES, WEIGHTS, RoadNetwork, search  # noqa: E402
+
+PKL_PATH = "data/Tai_Road_濃度_最大連通版.pkl"
+
+
+def legacy_path(G, start_node, end_node, weight):
+    try:
+        return nx.shortest_path(
+            G, start_node, end_node,
+            weight=lambda u, v, d: max(0, d.get("attr_dict", {}).get(weight, 0))
+        )
+    except nx.NetworkXNoPath:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=PKL_PATH)
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.pkl, "rb") as f:
+        G = pickle.load(f)
+    t0 = time.perf_counter()
+    net = RoadNetwork.from_graph(G)
+    for weight in WEIGHTS:
+        net.csr(weight)
+    print(f"engine build: {(time.perf_counter() - t0) * 1000:.1f} ms "
+          f"({net.num_nodes} nodes, {net.num_edges} edges)")
+
+    rnd = random.Random(args.seed)
+    pairs = [tuple(rnd.sample(range(net.num_nodes), 2)) for _ in range(args.pairs)]
+    for weight in WEIGHTS:
+        t_nx = t_csr = 0.0
+        mismatches = 0
+        for s, t in pairs:
+            t0 = time.perf_counter()
+            expected = legacy_path(G, net.nodes[s], net.nodes[t], weight)
+            t1 = time.perf_counter()
+            ids = net.shortest_path(s, t, weight)
+            t2 = time.perf_counter()
+            t_nx += t1 - t0
+            t_csr += t2 - t1
+            got = None if ids is None else [net.nodes[i] for i in ids]
+            mismatches += got != expected
+        n = len(pairs)
+        print(f"{weight:>8}: networkx {t_nx / n * 1000:8.2f} ms/query | "
+              f"csr {t_csr / n * 1000:8.2f} ms/query | "
+              f"speedup {t_nx / t_csr:5.1f}x | mismatched paths {mismatches}/{n}")
+
+    # 各搜尋模式：定案節點數與耗時，成本須與 Dijkstra 相同
+    for weight in WEIGHTS:
+        w = net.weight_array(weight)
+        reference = {}
+        for mode in SEARCH_MODES:
+            if mode == "ch" and weight not in net.ch:
+                # 收縮階層需先建立，見 benchmarks/bench_ch.py
+                continue
+            elapsed = settled = 0
+            cost_errors = 0
+            for s, t in pairs:
+                t0 = time.perf_counter()
+                ids, count = search(net, s, t, weight, mode)
+                elapsed += time.perf_counter() - t0
+                settled += count
+                cost = None if ids is None else w[net.csr_edges(weight, ids[:-1], ids[1:])].sum()
+                expected = reference.setdefault((s, t), cost)
+                if (cost is None) != (expected is None) or (
+                        cost is not None and abs(cost - expected) > 1e-9 * max(1.0, expected)):
+                    cost_errors += 1
+            n = len(pairs)
+            print(f"{weight:>8} {mode:>19}: {elapsed / n * 1000:8.2f} ms/query | "
+                  f"settled {settled / n:10.1f} nodes/query | cost mismatches {cost_errors}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# 比較 pickle 與二進位檔兩種載入方式的啟動時間與記憶體，並同時開多個行程看共用效果：
+# python benchmarks/bench_startup.py [pkl] [資料夾] [--repeat N] [--procs N]
+# 二進位檔需先以 python -m routing.build [pkl] [資料夾] 建好
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from routing.graph import ARTIFACT_PATH, PKL_PATH  # noqa: E402
+from routing.memory import memory_usage  # noqa: E402
+
+# 每次量測都在新的行程裡跑，避免前一次載入的快取與記憶體干擾；
+# 子行程算完第一條路徑後等 stdin 關閉才結束，讓父行程在所有行程都活著時讀記憶體
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import routing
+net = routing.load_graph({pkl!r}, {artifact!r})
+t1 = time.perf_counter()
+routing.compute_path(net, 0, net.num_nodes - 1, "length")
+routing.compute_path(net, 0, net.num_nodes - 1, "exposure")
+t2 = time.perf_counter()
+print(json.dumps({{"load_s": t1 - t0, "first_route_s": t2 - t1, "loaded_from": net.loaded_from}}),
+      flush=True)
+sys.stdin.read()
+"""
+
+
+def measure(pkl, artifact, procs=1):
+    """同時啟動 procs 個行程，回傳各行程的載入時間與記憶體；行程實際讀的來源與預期不同時丟出 RuntimeError。"""
+    code = CHILD.format(root=str(ROOT), pkl=pkl, artifact=artifact)
+    children = [subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                                 stdout=subprocess.PIPE, text=True) for _ in range(procs)]
+    results = []
+    try:
+        for child in children:
+            line = child.stdout.readline()
+            if not line:
+                raise RuntimeError("子行程沒有回報結果")
+            results.append(json.loads(line))
+        expected = "artifact" if artifact else "pickle"
+        wrong = [r["loaded_from"] for r in results if r["loaded_from"] != expected]
+        if wrong:
+            raise RuntimeError(f"預期讀 {expected}，子行程實際讀 {wrong[0]}")
+        for child, result in zip(children, results):
+            result.update(memory_usage(child.pid))
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+    return results
+
+
+def require_artifact(path):
+    # 沒有二進位檔時 load_graph 會改讀 pickle，量到的就是兩次 pickle，直接停下
+    if not os.path.isdir(path):
+        sys.exit(f"找不到路網二進位檔 {path}，請先執行 python -m routing.build [pkl] {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=ARTIFACT_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--procs", type=int, default=4, help="同時執行的行程數")
+    args = parser.parse_args()
+
+    require_artifact(args.artifact)
+    for name, artifact in [("pickle", None), ("artifact", args.artifact)]:
+        runs = [measure(args.pkl, artifact)[0] for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["load_s"])
+        print(f"{name:>8}: load {best['load_s'] * 1000:8.1f} ms | "
+              f"first route {best['first_route_s'] * 1000:7.1f} ms | "
+              f"RSS {best['rss_mb']:7.1f} MB")
+
+    # 多個行程同時在線：PSS 把共用頁面按行程數分攤，總和才是實際占用的記憶體；
+    # 沒有二進位檔時兩組都是 pickle，PSS 會一樣，所以量之前再確認一次
+    require_artifact(args.artifact)
+    for name, artifact in [("pickle", None), ("artifact", args.artifact)]:
+        runs = measure(args.pkl, artifact, args.procs)
+        for i, r in enumerate(runs):
+            print(f"{name:>8} #{i}: load {r['load_s'] * 1000:8.1f} ms | RSS {r['rss_mb']:7.1f} MB | "
+                  f"shared {r.get('shared_mb', 0):7.1f} MB | private {r.get('private_mb', 0):7.1f} MB")
+        total = sum(r.get("pss_mb", r["rss_mb"]) for r in runs)
+        print(f"{name:>8}: {args.procs} 個行程合計 PSS {total:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# 路徑計算整套基準測試：以固定種子在路網上產生短程、中程、跨市區起訖點，
+# 量測載入、找最近節點、兩種權重的路徑搜尋、統計表格與 folium 地圖，結果寫成 JSON：
+# python benchmarks/bench_suite.py [pkl] [artifact] [--pairs N] [--seed S] [--out 結果.json]
+# 比較兩次結果（p50 / p90 變慢超過門檻即標示並回傳非 0）：
+# python benchmarks/bench_suite.py --compare 舊.json 新.json [--threshold 0.1]
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import folium
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import routing  # noqa: E402
+from bench_startup import measure  # noqa: E402
+from routing.projection import twd97_to_latlon  # noqa: E402
+from routing.stats import SPEEDS, improvement_rate, route_stats  # noqa: E402
+
+# 起訖點直線距離分組（公尺）
+OD_CLASSES = {"short": (0, 2000), "medium": (2000, 8000), "cross_city": (8000, np.inf)}
+SNAP_JITTER = 50  # 起訖點離節點的隨機偏移（公尺），讓找最近節點不是剛好落在節點上
+PERCENTILES = (50, 90, 99)
+
+
+# ========== 起訖點 ==========
+def generate_od(G, pairs, seed):
+    """每組各 pairs 筆 (起點 lat, lon, 終點 lat, lon)；隨機抽節點對直到每組都滿或嘗試太多次。"""
+    rng = np.random.default_rng(seed)
+    od = {name: [] for name in OD_CLASSES}
+    for _ in range(1000):
+        if all(len(v) >= pairs for v in od.values()):
+            break
+        s = rng.integers(G.num_nodes, size=4096)
+        t = rng.integers(G.num_nodes, size=4096)
+        dist = np.hypot(*(G.xy[s] - G.xy[t]).T)
+        for name, (lo, hi) in OD_CLASSES.items():
+            pick = np.flatnonzero((dist >= lo) & (dist < hi) & (s != t))[:pairs - len(od[name])]
+            for a, b in zip(s[pick], t[pick]):
+                xy = G.xy[[a, b]] + rng.uniform(-SNAP_JITTER, SNAP_JITTER, (2, 2))
+                (lat1, lon1), (lat2, lon2) = twd97_to_latlon(xy).tolist()
+                od[name].append((lat1, lon1, lat2, lon2))
+    return od
+
+
+# ========== 與 app.py 相同的後處理 ==========
+def build_table(routes, speed):
+    (_, dist1, expo1), (_, dist2, expo2) = routes["length"], routes["exposure"]
+    stats = [route_stats(dist1, expo1, speed), route_stats(dist2, expo2, speed)]
+    improvement_rate(stats[0][2], stats[1][2])
+    return pd.DataFrame({
+        "路徑": ["最短路徑", "最低暴露路徑"],
+        "總距離 (km)": [round(float(d), 2) for d, _, _ in stats],
+        "預估時間 (min)": [round(float(t), 2) for _, t, _ in stats],
+        "每分鐘暴露量 (μg/m3)": [round(float(r), 2) for _, _, r in stats],
+    })
+
+
+def build_map(G, s, t, points):
+    m = folium.Map(location=[25.04, 121.56], zoom_start=13)
+    for pt, color in zip(points, ("green", "red")):
+        folium.Marker(location=pt, icon=folium.Icon(color=color)).add_to(m)
+    for weight, color in (("length", "blue"), ("exposure", "#00d26a")):
+        coords = routing.route_geometry(G, s, t, weight)
+        if coords:
+            folium.PolyLine(coords, color=color, weight=4).add_to(m)
+    # st_folium 送到瀏覽器的是整頁 HTML，render 的時間就是組地圖的成本
+    return m.get_root().render()
+
+
+# ========== 統計 ==========
+def summarize(samples):
+    ms = np.asarray(samples, dtype=float) * 1000
+    if len(ms) == 0:
+        return {"n": 0}
+    out = {"n": len(ms), "mean_ms": float(ms.mean()), "min_ms": float(ms.min()),
+           "max_ms": float(ms.max())}
+    out.update({f"p{p}_ms": float(np.percentile(ms, p)) for p in PERCENTILES})
+    return out
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(pkl, artifact, pairs, seed, load_repeat):
+    load = [measure(pkl, artifact)[0]["load_s"] for _ in range(load_repeat)]
+    G = routing.load_graph(pkl, artifact)
+    speed = SPEEDS["機車"]
+    samples = {"load": load}
+    od = generate_od(G, pairs, seed)
+    for name, rows in od.items():
+        for key in ("snap", "route_length", "route_exposure", "stats", "map"):
+            samples.setdefault(f"{key}/{name}", [])
+        for lat1, lon1, lat2, lon2 in rows:
+            (s, t), elapsed = timed(lambda: (routing.find_nearest_node(G, lat1, lon1),
+                                             routing.find_nearest_node(G, lat2, lon2)))
+            samples[f"snap/{name}"].append(elapsed / 2)
+            if s is None or t is None:
+                continue
+            # 每組都清快取，量的是實際搜尋而不是快取命中
+            G.route_cache.clear()
+            routes = {}
+            for weight in routing.WEIGHTS:
+                routes[weight], elapsed = timed(routing.compute_path, G, s, t, weight)
+                samples[f"route_{weight}/{name}"].append(elapsed)
+            if routes["length"][0] is None:
+                continue
+            _, elapsed = timed(build_table, routes, speed)
+            samples[f"stats/{name}"].append(elapsed)
+            points = [G.latlon[s].tolist(), G.latlon[t].tolist()]
+            _, elapsed = timed(build_map, G, s, t, points)
+            samples[f"map/{name}"].append(elapsed)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pkl": pkl,
+            "artifact": artifact,
+            "nodes": G.num_nodes,
+            "edges": G.num_edges,
+            "seed": seed,
+            "pairs": {name: len(rows) for name, rows in od.items()},
+        },
+        "metrics": {key: summarize(v) for key, v in samples.items()},
+    }
+
+
+# ========== 比較 ==========
+def compare(base, new, threshold):
+    """列出兩次結果的 p50 / p90，變慢超過 threshold（比例）的項目標為 REGRESSION，回傳其數目。"""
+    regressions = 0
+    print(f"{'項目':<28}{'舊 p50':>10}{'新 p50':>10}{'變化':>9}{'舊 p90':>10}{'新 p90':>10}{'變化':>9}")
+    for key in sorted(set(base["metrics"]) | set(new["metrics"])):
+        a, b = base["metrics"].get(key, {}), new["metrics"].get(key, {})
+        if not a.get("n") or not b.get("n"):
+            print(f"{key:<28}  （只有一邊有資料）")
+            continue
+        line, flagged = f"{key:<28}", False
+        for p in ("p50_ms", "p90_ms"):
+            change = b[p] / a[p] - 1 if a[p] > 0 else 0.0
+            flagged |= change > threshold
+            line += f"{a[p]:10.2f}{b[p]:10.2f}{change:+9.1%}"
+        if flagged:
+            regressions += 1
+            line += "  REGRESSION"
+        print(line)
+    print(f"{regressions} 項變慢超過 {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--pairs", type=int, default=50, help="每組起訖點數")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--load-repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.compare:
+        base, new = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        return 1 if compare(base, new, args.threshold) else 0
+
+    result = run_suite(args.pkl, args.artifact, args.pairs, args.seed, args.load_repeat)
+    Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    for key, m in result["metrics"].items():
+        if m.get("n"):
+            print(f"{key:<28} n={m['n']:4d} | p50 {m['p50_ms']:9.2f} ms | "
+                  f"p90 {m['p90_ms']:9.2f} ms | p99 {m['p99_ms']:9.2f} ms")
+    print(f"✅ 結果寫入 {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# 路徑總長 / 總暴露量的計算成本：逐步查相鄰邊加總（舊作法）與搜尋選到的邊 id 一次加總，
+# 以跨市區的長路徑量測，並列出平行邊造成兩者不一致的路徑數：
+# python benchmarks/bench_totals.py [pkl] [artifact] [--pairs N] [--repeat N]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import routing  # noqa: E402
+from bench_suite import generate_od  # noqa: E402
+
+
+def walk_totals(G, path):
+    # 舊作法：每一步找出兩點間的邊再加總，平行邊會全部算進去
+    total = exposure = 0.0
+    for u, v in zip(path[:-1], path[1:]):
+        edges = G.edges_between(u, v)
+        total += G.length[edges].sum()
+        exposure += G.exposure[edges].sum()
+    return total, exposure
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pkl", nargs="?", default=routing.PKL_PATH)
+    parser.add_argument("artifact", nargs="?", default=routing.ARTIFACT_PATH)
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    G = routing.load_graph(args.pkl, args.artifact)
+    routes = []
+    for lat1, lon1, lat2, lon2 in generate_od(G, args.pairs, args.seed)["cross_city"]:
+        s = routing.find_nearest_node(G, lat1, lon1, np.inf)
+        t = routing.find_nearest_node(G, lat2, lon2, np.inf)
+        for weight in routing.WEIGHTS:
+            path, edges, _ = routing.search_edges(G, s, t, weight)
+            if path is not None and len(path) > 1:
+                routes.append((weight, path, edges))
+    if not routes:
+        print("沒有跨市區的路徑")
+        return
+    hops = np.mean([len(edges) for _, _, edges in routes])
+    print(f"{len(routes)} 條路徑，平均 {hops:.0f} 步")
+
+    t_walk = best_of(lambda: [walk_totals(G, path.tolist()) for _, path, _ in routes], args.repeat)
+    t_lookup = best_of(lambda: [G.path_totals(path, weight) for weight, path, _ in routes],
+                       args.repeat)
+    t_gather = best_of(lambda: [G.edge_totals(edges) for _, _, edges in routes], args.repeat)
+    n = len(routes)
+    print(f"逐步加總        {t_walk / n * 1000:8.3f} ms/路徑")
+    print(f"節點查邊 + 加總 {t_lookup / n * 1000:8.3f} ms/路徑 ({t_walk / t_lookup:6.1f}x)")
+    print(f"邊 id 直接加總  {t_gather / n * 1000:8.3f} ms/路徑 ({t_walk / t_gather:6.1f}x)")
+
+    differ = sum(not np.allclose(walk_totals(G, path.tolist()), G.edge_totals(edges))
+                 for _, path, edges in routes)
+    print(f"平行邊使總量不同的路徑：{differ}/{n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# 本機模擬的 Google Geocoding API，測試時取代真正的服務：
+# python benchmarks/mock_geocoder.py [--port 8765] [--delay 0.2]
+# 再以 GEOCODE_URL=http://127.0.0.1:8765/geocode/json 啟動 app；tests/test_geocode.py 也以它取代 Google
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 地址雜湊後落在這個範圍內（大台北）
+BBOX = (24.95, 121.45, 25.10, 121.62)  # 南、西、北、東
+
+
+def fake_location(address):
+    h = hashlib.sha1(address.encode("utf-8")).digest()
+    fy = int.from_bytes(h[:4], "big") / 2 ** 32
+    fx = int.from_bytes(h[4:8], "big") / 2 ** 32
+    south, west, north, east = BBOX
+    return south + fy * (north - south), west + fx * (east - west)
+
+
+class MockGeocoder(ThreadingHTTPServer):
+    """每個請求先等 delay 秒再回應；requests 記錄收到的請求數，missing 裡的地址回 ZERO_RESULTS。"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, delay=0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.delay = delay
+        self.requests = 0
+        self.missing = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/geocode/json"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05},
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if any(m in query.get("address", "") for m in self.server.missing):
+            body = {"status": "ZERO_RESULTS", "results": []}
+        elif "address" in query:
+            lat, lng = fake_location(query["address"])
+            body = {"status": "OK", "results": [{
+                "formatted_address": query["address"],
+                "geometry": {"location": {"lat": lat, "lng": lng}},
+            }]}
+        elif "latlng" in query:
+            body = {"status": "OK", "results": [{"formatted_address": f"模擬地址 {query['latlng']}"}]}
+        else:
+            body = {"status": "INVALID_REQUEST", "results": []}
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.2, help="每個請求的模擬延遲（秒）")
+    args = parser.parse_args()
+    server = MockGeocoder(args.port, args.delay)
+    print(f"模擬 geocoder：{server.url}（延遲 {args.delay} 秒）")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from routing.alternatives import ALTERNATIVE_ROUTES, alternative_routes
+from routing.artifact import build_artifact, load_artifact, save_artifact
+from routing.cache import ROUTE_CACHE_SIZE, RouteCache
+from routing.geometry import DEFAULT_ZOOM, path_coords, route_latlon, simplify_coords, zoom_tolerance
+from routing.graph import (
+    ARTIFACT_PATH,
+    PKL_PATH,
+    SEARCH_MODE,
+    compute_alternatives,
+    compute_isochrone,
+    compute_isoexposure,
+    compute_pareto,
+    compute_path,
+    find_nearest_node,
+    load_graph,
+    route_geometry,
+)
+from routing.network import WEIGHTS, RoadNetwork, edge_attrs
+from routing.pareto import PARETO_ROUTES, pareto_frontier, pareto_routes
+from routing.search import SEARCH_MODES, search, search_edges
+from routing.spatial import MAX_SNAP_DIST, NodeIndex
+
+__all__ = [
+    "ALTERNATIVE_ROUTES",
+    "ARTIFACT_PATH",
+    "DEFAULT_ZOOM",
+    "MAX_SNAP_DIST",
+    "NodeIndex",
+    "PARETO_ROUTES",
+    "PKL_PATH",
+    "ROUTE_CACHE_SIZE",
+    "RoadNetwork",
+    "RouteCache",
+    "SEARCH_MODE",
+    "SEARCH_MODES",
+    "WEIGHTS",
+    "alternative_routes",
+    "build_artifact",
+    "compute_alternatives",
+    "compute_isochrone",
+    "compute_isoexposure",
+    "compute_pareto",
+    "compute_path",
+    "edge_attrs",
+    "find_nearest_node",
+    "load_artifact",
+    "load_graph",
+    "pareto_frontier",
+    "pareto_routes",
+    "path_coords",
+    "route_geometry",
+    "route_latlon",
+    "save_artifact",
+    "search",
+    "search_edges",
+    "simplify_coords",
+    "zoom_tolerance",
+]
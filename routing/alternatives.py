@@ -0,0 +1,64 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+ALTERNATIVE_ROUTES = 3  # 含最佳路徑在內最多幾條
+PENALTY = 0.5  # 每次找到路徑後，其上的邊權重乘上 (1 + PENALTY)
+MAX_OVERLAP = 0.7  # 與任一已選路徑共用的長度比例上限
+MAX_STRETCH = 0.4  # 成本最多比最佳路徑多幾成
+MAX_ITERATIONS = 4  # 每要一條路徑最多跑幾次搜尋
+
+
+# ========== 懲罰法替代路徑 ==========
+def alternative_routes(G, source, target, weight, k=ALTERNATIVE_ROUTES, penalty=PENALTY,
+                       max_overlap=MAX_OVERLAP, max_stretch=MAX_STRETCH):
+    """懲罰法（penalty method）求最多 k 條替代路徑 [(path, 總長, 總暴露量)]，依原始成本遞增，第一條為最佳路徑。
+
+    每找到一條路徑就把路徑上的邊加重後再搜尋一次；新路徑的原始成本不超過最佳的
+    (1 + max_stretch) 倍、與已選路徑共用的長度比例不超過 max_overlap 才收下。
+    加權只改 CSR 的 data，結構與 G.view(weight) 的快照共用，每次搜尋不必重建矩陣。
+    """
+    if source == target:
+        return [([source], 0.0, 0.0)]
+    view = G.view(weight)
+    matrix, eid, cost = view.matrix, view.eid, view.weights
+    factor = np.ones(len(cost))
+    chosen = []
+    best = None
+    for _ in range(k * MAX_ITERATIONS):
+        penalized = csr_matrix((matrix.data * factor[eid], matrix.indices, matrix.indptr),
+                               shape=matrix.shape)
+        path = _search(penalized, source, target)
+        if path is None:
+            break
+        edges = view.path_edges(path)
+        total = float(cost[edges].sum())
+        if best is None:
+            best = total
+        if total <= best * (1 + max_stretch) and all(
+                overlap(view, edges, other) <= max_overlap for _, _, other in chosen):
+            chosen.append((total, path, edges))
+            if len(chosen) >= k:
+                break
+        factor[edges] *= 1 + penalty
+    # 找到的順序不一定是成本順序，依原始權重的成本排，最好的替代路徑排在前面
+    chosen.sort(key=lambda c: c[0])
+    return [(path, *view.edge_totals(edges)) for _, path, edges in chosen]
+
+
+def _search(matrix, source, target):
+    _, pred = dijkstra(matrix, directed=True, indices=source, return_predecessors=True)
+    if source != target and pred[target] < 0:
+        return None
+    path = [target]
+    while path[-1] != source:
+        path.append(int(pred[path[-1]]))
+    return path[::-1]
+
+
+def overlap(G, edges, other):
+    # edges 的長度中有多少比例也在 other 上
+    total = G.length[edges].sum()
+    if total <= 0:
+        return 1.0
+    return float(G.length[np.intersect1d(edges, other)].sum() / total)
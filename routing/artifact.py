@@ -0,0 +1,91 @@
+import json
+import os
+import pickle
+
+import numpy as np
+
+from scipy.sparse import csr_matrix
+
+from routing.ch import load_hierarchies
+from routing.network import WEIGHTS, RoadNetwork
+
+ARTIFACT_FORMAT = 1
+ARRAYS = (
+    "xy", "latlon", "u", "v", "length", "exposure", "geom_offsets", "geom_coords",
+    "adj_indptr", "adj_indices", "adj_edge",
+)
+# 各權重的 CSR（去除平行邊後）也存檔，各行程直接 mmap，不必各自重建一份；舊檔沒有時照常現場建立
+CSR_PARTS = ("indptr", "indices", "data", "eid")
+
+
+# ========== 寫出 ==========
+def save_artifact(net, path):
+    # 每個陣列一個 .npy，讀取時可直接 mmap
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        "xy": net.xy,
+        "latlon": net.latlon,
+        "u": net.u,
+        "v": net.v,
+        "length": net.length,
+        "exposure": net.exposure,
+        "geom_offsets": net.geom_offsets,
+        "geom_coords": net.geom_coords,
+        "adj_indptr": net.adjacency[0],
+        "adj_indices": net.adjacency[1],
+        "adj_edge": net.adjacency[2],
+    }
+    for weight in WEIGHTS:
+        matrix, eid = net.csr(weight)
+        parts = (matrix.indptr, matrix.indices, matrix.data, eid)
+        arrays.update({f"csr_{weight}_{part}": arr for part, arr in zip(CSR_PARTS, parts)})
+    if net.closed.any():
+        arrays["closed"] = net.closed
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr))
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "directed": bool(net.directed),
+        "num_nodes": net.num_nodes,
+        "num_edges": net.num_edges,
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+# ========== 讀取 ==========
+def load_artifact(path, mmap=True):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"不支援的路網檔格式：{meta.get('format')}")
+    mode = "r" if mmap else None
+    a = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+    net = RoadNetwork(
+        a["xy"], a["u"], a["v"], a["length"], a["exposure"],
+        geom_offsets=a["geom_offsets"],
+        geom_coords=a["geom_coords"],
+        latlon=a["latlon"],
+        directed=meta["directed"],
+        adjacency=(a["adj_indptr"], a["adj_indices"], a["adj_edge"]),
+    )
+    if os.path.exists(os.path.join(path, "closed.npy")):
+        net.closed = np.load(os.path.join(path, "closed.npy"))
+    for weight in WEIGHTS:
+        files = [os.path.join(path, f"csr_{weight}_{part}.npy") for part in CSR_PARTS]
+        if all(os.path.exists(f) for f in files):
+            indptr, indices, data, eid = (np.load(f, mmap_mode=mode) for f in files)
+            # 以 (data, indices, indptr) 建構不會複製，矩陣直接指向 mmap 的頁面
+            matrix = csr_matrix((data, indices, indptr), shape=(net.num_nodes, net.num_nodes))
+            net._views[weight] = net._new_view(net.weight_array(weight), matrix, eid)
+    net.ch = load_hierarchies(path)
+    return net
+
+
+def build_artifact(pkl_path, path):
+    with open(pkl_path, "rb") as f:
+        G = pickle.load(f)
+    net = RoadNetwork.from_graph(G)
+    save_artifact(net, path)
+    return net
+
@@ -0,0 +1,165 @@
+# 離線批次起訖點路徑計算：
+# python -m routing.batch od.csv 輸出.parquet [--workers N] [--chunk-size N]
+# 輸入需有 start_lat, start_lon, end_lat, end_lon 欄位（CSV 或 Parquet），其他欄位原樣保留
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from routing.graph import ARTIFACT_PATH, PKL_PATH, compute_path, load_graph
+from routing.spatial import MAX_SNAP_DIST
+from routing.stats import SPEEDS, improvement_rate, route_stats
+
+CHUNK_SIZE = 500
+OD_COLUMNS = ["start_lat", "start_lon", "end_lat", "end_lon"]
+
+# 工作行程共用的唯讀路網：fork 時直接繼承父行程（copy-on-write），否則各自 mmap 載入
+_G = None
+
+
+def _init_worker(pkl_path, artifact_path):
+    global _G
+    if _G is None:
+        _G = load_graph(pkl_path, artifact_path)
+
+
+# ========== 讀寫 ==========
+def read_od(path):
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+class ResultWriter:
+    """逐批寫出結果，CSV 以附加方式、Parquet 以 row group 方式寫入。"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._parquet = None
+        self._header = True
+
+    def write(self, df):
+        if self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._header else "a", header=self._header,
+                      index=False, encoding="utf-8-sig" if self._header else "utf-8")
+            self._header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+# ========== 批次計算 ==========
+def snap_od(G, od, max_dist=MAX_SNAP_DIST):
+    # 所有起訖點一次找最近節點；超出範圍為 -1
+    start, _ = G.index.snap(od["start_lat"].to_numpy(), od["start_lon"].to_numpy(), max_dist)
+    end, _ = G.index.snap(od["end_lat"].to_numpy(), od["end_lon"].to_numpy(), max_dist)
+    return start, end
+
+
+def route_chunk(G, od, start, end):
+    n = len(od)
+    dist = {w: np.full(n, np.nan) for w in ("length", "exposure")}
+    expo = {w: np.full(n, np.nan) for w in ("length", "exposure")}
+    for i, (s, t) in enumerate(zip(start.tolist(), end.tolist())):
+        if s < 0 or t < 0:
+            continue
+        for weight in ("length", "exposure"):
+            path, total, exposure = compute_path(G, s, t, weight)
+            if path is not None:
+                dist[weight][i], expo[weight][i] = total, exposure
+
+    out = od.reset_index(drop=True).copy()
+    out["start_node"], out["end_node"] = start, end
+    rates = {}
+    for weight, prefix in (("length", "shortest"), ("exposure", "lowexp")):
+        out[f"{prefix}_km"] = dist[weight] / 1000
+        out[f"{prefix}_exposure"] = expo[weight]
+        for mode, speed in SPEEDS.items():
+            _, time_min, rate = route_stats(dist[weight], expo[weight], speed)
+            out[f"{prefix}_min_{mode}"] = time_min
+            out[f"{prefix}_rate_{mode}"] = rate
+            rates[prefix] = rate
+    # 改善率與速度無關（時間相消），取任一交通方式計算即可
+    out["improve_pct"] = improvement_rate(rates["shortest"], rates["lowexp"])
+    return out
+
+
+def _route_chunk_worker(od, start, end):
+    return route_chunk(_G, od, start, end)
+
+
+def run_batch(od_path, out_path, workers=None, chunk_size=CHUNK_SIZE,
+              pkl_path=PKL_PATH, artifact_path=ARTIFACT_PATH, max_dist=MAX_SNAP_DIST):
+    """計算 OD 檔中每一組起訖點的最短與最低暴露路徑，逐批寫到 out_path，回傳 (筆數, 秒數)。"""
+    global _G
+    t0 = time.perf_counter()
+    od = read_od(od_path)
+    missing = [c for c in OD_COLUMNS if c not in od.columns]
+    if missing:
+        raise ValueError(f"OD 檔缺少欄位：{missing}")
+
+    _G = load_graph(pkl_path, artifact_path)
+    start, end = snap_od(_G, od, max_dist)
+    chunks = [(od.iloc[i:i + chunk_size], start[i:i + chunk_size], end[i:i + chunk_size])
+              for i in range(0, len(od), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    executor = None
+    if workers > 1 and len(chunks) > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                       initargs=(pkl_path, artifact_path))
+    writer = ResultWriter(out_path)
+    done = 0
+    try:
+        if executor is None:
+            results = (route_chunk(_G, *c) for c in chunks)
+        else:
+            results = executor.map(_route_chunk_worker, *zip(*chunks))
+        for df in results:
+            writer.write(df)
+            done += len(df)
+            elapsed = time.perf_counter() - t0
+            print(f"\r{done}/{len(od)} 組，{done * 2 / elapsed:.1f} routes/s",
+                  end="", file=sys.stderr)
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    print(file=sys.stderr)
+    return done, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批次計算起訖點的最短與最低暴露路徑")
+    parser.add_argument("od")
+    parser.add_argument("out")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--pkl", default=PKL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    parser.add_argument("--max-dist", type=float, default=MAX_SNAP_DIST)
+    args = parser.parse_args(argv)
+
+    done, elapsed = run_batch(args.od, args.out, args.workers, args.chunk_size,
+                              args.pkl, args.artifact, args.max_dist)
+    print(f"✅ {done} 組起訖點、{done * 2} 條路徑，{elapsed:.1f} 秒"
+          f"（{done * 2 / elapsed:.1f} routes/s）")
+
+
+if __name__ == "__main__":
+    main()
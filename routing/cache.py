@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+
+# ========== 系統參數 ==========
+ROUTE_CACHE_SIZE = 512  # 最多保留的路徑結果數
+
+
+# ========== 路徑結果快取（LRU）==========
+class RouteCache:
+    """以 (起點, 終點, 權重, 圖版本) 為鍵的 LRU 快取，跨 Streamlit session 共用。"""
+
+    def __init__(self, maxsize=ROUTE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,271 @@
+# 收縮階層（Contraction Hierarchies）：python -m routing.build --ch 離線建立，
+# 存在路網二進位檔旁的 ch_<權重>/，load_graph 會自動載入
+import json
+import math
+import os
+import random
+import time
+from heapq import heapify, heappop, heappush
+
+import numpy as np
+
+from routing.search import search
+
+WITNESS_SETTLE_LIMIT = 60  # witness search 最多定案的節點數，超過就直接加捷徑（仍然正確）
+CALIBRATION_PAIRS = 50  # 建立後量測查詢速度用的隨機起訖點數
+MIN_SPEEDUP = 1.2  # 量測比 Dijkstra 快這麼多倍以上，SEARCH_MODE "auto" 才用 CH
+CH_ARRAYS = ("rank", "fwd_indptr", "fwd_indices", "fwd_data", "fwd_mid",
+             "bwd_indptr", "bwd_indices", "bwd_data", "bwd_mid")
+
+
+def ch_path(artifact_path, weight):
+    return os.path.join(artifact_path, f"ch_{weight}")
+
+
+# ========== 收縮階層 ==========
+class ContractionHierarchy:
+    """單一權重的收縮階層。
+
+    fwd 第 v 列為 v → x（rank[x] > rank[v]）的邊，bwd 第 v 列為 x → v（rank[x] > rank[v]）
+    的邊，皆為 (indptr, 鄰點, 權重, 中間節點) 的 CSR；中間節點 -1 表示原始邊。
+    speedup 為建立時量測的 Dijkstra / CH 查詢時間比，未量測為 None。
+    """
+
+    def __init__(self, rank, fwd, bwd, speedup=None):
+        self.rank = rank
+        self.fwd = fwd
+        self.bwd = bwd
+        self.speedup = speedup
+        self._lists = None
+
+    @property
+    def faster(self):
+        # 查詢是純 Python，小路網上可能比 scipy Dijkstra 慢，只有量測較快時才預設使用
+        return self.speedup is not None and self.speedup >= MIN_SPEEDUP
+
+    def lists(self):
+        # 查詢逐一讀取元素，轉成 Python list
+        if self._lists is None:
+            self._lists = (
+                self.rank.tolist(),
+                tuple(a.tolist() for a in self.fwd),
+                tuple(a.tolist() for a in self.bwd),
+            )
+        return self._lists
+
+    # ========== 查詢 ==========
+    def query(self, source, target):
+        """雙向向上搜尋，回傳 (原圖節點 id 陣列或 None, 定案節點數)。"""
+        if source == target:
+            return np.array([source]), 1
+        _, fwd, bwd = self.lists()
+        graphs = (fwd, bwd)
+        dist = ({source: 0.0}, {target: 0.0})
+        pred = ({source: -1}, {target: -1})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meet, settled = math.inf, None, 0
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                d, u = heappop(heap)
+                if d > dist[side][u]:
+                    continue
+                if d >= best:
+                    heap.clear()
+                    continue
+                settled += 1
+                other = dist[1 - side].get(u)
+                if other is not None and d + other < best:
+                    best, meet = d + other, u
+                indptr, indices, data, _ = graphs[side]
+                for k in range(indptr[u], indptr[u + 1]):
+                    v = indices[k]
+                    nd = d + data[k]
+                    if nd < dist[side].get(v, math.inf):
+                        dist[side][v] = nd
+                        pred[side][v] = u
+                        heappush(heap, (nd, v))
+        if meet is None:
+            return None, settled
+
+        up = [meet]
+        while pred[0][up[-1]] >= 0:
+            up.append(pred[0][up[-1]])
+        down = [meet]
+        while pred[1][down[-1]] >= 0:
+            down.append(pred[1][down[-1]])
+        hops = up[::-1] + down[1:]
+        path = [source]
+        for a, b in zip(hops[:-1], hops[1:]):
+            self._unpack(a, b, path)
+        return np.array(path), settled
+
+    def _edge(self, a, b):
+        # 邊 a → b 存在 rank 較低一端的列裡
+        rank, fwd, bwd = self.lists()
+        if rank[a] < rank[b]:
+            (indptr, indices, data, mid), row, other = fwd, a, b
+        else:
+            (indptr, indices, data, mid), row, other = bwd, b, a
+        for k in range(indptr[row], indptr[row + 1]):
+            if indices[k] == other:
+                return data[k], mid[k]
+        raise KeyError((a, b))
+
+    def _unpack(self, a, b, path):
+        # 把捷徑 a → b 展開成原始邊，依序把 a 之後的節點接到 path
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            m = self._edge(x, y)[1]
+            if m < 0:
+                path.append(y)
+            else:
+                stack.append((m, y))
+                stack.append((x, m))
+
+    # ========== 存取 ==========
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        arrays = dict(zip(CH_ARRAYS, (self.rank, *self.fwd, *self.bwd)))
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"speedup": self.speedup}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        a = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in CH_ARRAYS]
+        speedup = None
+        if os.path.exists(os.path.join(path, "meta.json")):
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                speedup = json.load(f).get("speedup")
+        return cls(a[0], tuple(a[1:5]), tuple(a[5:9]), speedup)
+
+
+# ========== 量測 ==========
+def measure_speedup(G, ch, weight, pairs=CALIBRATION_PAIRS, seed=0):
+    """同一批隨機起訖點上 Dijkstra 與 CH 的總查詢時間比（> 1 表示 CH 較快）。"""
+    rnd = random.Random(seed)
+    od = [tuple(rnd.sample(range(G.num_nodes), 2)) for _ in range(pairs)]
+    ch.query(*od[0])  # 第一次查詢會把陣列轉成 list，不計入
+    t0 = time.perf_counter()
+    for s, t in od:
+        search(G, s, t, weight, "dijkstra")
+    t1 = time.perf_counter()
+    for s, t in od:
+        ch.query(s, t)
+    t2 = time.perf_counter()
+    return (t1 - t0) / max(t2 - t1, 1e-9)
+
+
+# ========== 前處理 ==========
+def _witness(out, u, avoid, max_cost):
+    # 從 u 出發、不經過 avoid 的有限搜尋；找到的距離皆為實際路徑長，可當 witness
+    dist = {u: 0.0}
+    heap = [(0.0, u)]
+    settled = 0
+    while heap:
+        d, x = heappop(heap)
+        if d > dist[x]:
+            continue
+        if d > max_cost or settled >= WITNESS_SETTLE_LIMIT:
+            break
+        settled += 1
+        for y, (w, _) in out[x].items():
+            if y == avoid:
+                continue
+            nd = d + w
+            if nd < dist.get(y, math.inf):
+                dist[y] = nd
+                heappush(heap, (nd, y))
+    return dist
+
+
+def _shortcuts(out, inn, v):
+    needed = []
+    for u, (wu, _) in inn[v].items():
+        targets = [(x, wu + wx) for x, (wx, _) in out[v].items() if x != u]
+        if not targets:
+            continue
+        dist = _witness(out, u, v, max(c for _, c in targets))
+        needed.extend((u, x, c) for x, c in targets if dist.get(x, math.inf) > c)
+    return needed
+
+
+def _rows_to_csr(rows):
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    flat = [item for r in rows for item in r]
+    indices = np.array([x for x, _ in flat], dtype=np.int32)
+    data = np.array([w for _, (w, _) in flat], dtype=float)
+    mid = np.array([m for _, (_, m) in flat], dtype=np.int32)
+    return indptr, indices, data, mid
+
+
+def build_ch(G, weight):
+    """依 edge difference（捷徑數 - 移除邊數 + 已收縮鄰點數）以 lazy update 決定收縮順序。"""
+    matrix, _ = G.csr(weight)
+    n = G.num_nodes
+    out = [dict() for _ in range(n)]
+    inn = [dict() for _ in range(n)]
+    src = np.repeat(np.arange(n), np.diff(matrix.indptr)).tolist()
+    for a, b, w in zip(src, matrix.indices.tolist(), matrix.data.tolist()):
+        if a != b:
+            out[a][b] = (w, -1)
+            inn[b][a] = (w, -1)
+
+    deleted = [0] * n
+
+    def priority(v):
+        return len(_shortcuts(out, inn, v)) - len(inn[v]) - len(out[v]) + deleted[v]
+
+    heap = [(priority(v), v) for v in range(n)]
+    heapify(heap)
+    rank = np.empty(n, dtype=np.int32)
+    fwd_rows, bwd_rows = [None] * n, [None] * n
+    order = 0
+    while heap:
+        _, v = heappop(heap)
+        shortcuts = _shortcuts(out, inn, v)
+        p = len(shortcuts) - len(inn[v]) - len(out[v]) + deleted[v]
+        if heap and p > heap[0][0]:
+            heappush(heap, (p, v))
+            continue
+        rank[v] = order
+        order += 1
+        fwd_rows[v] = list(out[v].items())
+        bwd_rows[v] = list(inn[v].items())
+        for x in out[v]:
+            del inn[x][v]
+            deleted[x] += 1
+        for u in inn[v]:
+            del out[u][v]
+            deleted[u] += 1
+        out[v], inn[v] = {}, {}
+        for u, x, c in shortcuts:
+            if c < out[u].get(x, (math.inf,))[0]:
+                out[u][x] = (c, v)
+                inn[x][u] = (c, v)
+    return ContractionHierarchy(rank, _rows_to_csr(fwd_rows), _rows_to_csr(bwd_rows))
+
+
+def build_hierarchies(G, artifact_path, weights=("length", "exposure")):
+    # 建好後順便量測查詢速度，SEARCH_MODE "auto" 依此決定要不要用
+    for weight in weights:
+        ch = G.ch[weight] = build_ch(G, weight)
+        ch.speedup = measure_speedup(G, ch, weight)
+        ch.save(ch_path(artifact_path, weight))
+    return G.ch
+
+
+def load_hierarchies(artifact_path):
+    # 回傳 {權重: ContractionHierarchy}，只載入已建好的部分
+    if not artifact_path:
+        return {}
+    return {w: ContractionHierarchy.load(ch_path(artifact_path, w))
+            for w in ("length", "exposure") if os.path.isdir(ch_path(artifact_path, w))}
+
@@ -0,0 +1,77 @@
+# routing.service 的 HTTP 用戶端，回傳格式與本機的 routing 函式相同
+import requests
+from requests.adapters import HTTPAdapter
+
+from routing.alternatives import ALTERNATIVE_ROUTES
+from routing.geometry import DEFAULT_ZOOM
+from routing.pareto import PARETO_ROUTES
+from routing.spatial import MAX_SNAP_DIST
+
+CLIENT_TIMEOUT = (3, 30)  # 連線、讀取逾時（秒）
+CLIENT_POOL_SIZE = 8
+
+
+class RoutingClient:
+    """以共用連線池呼叫路徑服務；服務錯誤（4xx/5xx）以 requests.HTTPError 丟出。"""
+
+    def __init__(self, base_url, timeout=CLIENT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=CLIENT_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, path, **params):
+        response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def health(self):
+        return self._get("/health")
+
+    def find_nearest_node(self, lat, lon, max_dist=MAX_SNAP_DIST):
+        """回傳 (節點 id, [lat, lon])；離路網太遠時回傳 None。"""
+        result = self._get("/nearest", lat=lat, lon=lon, max_dist=max_dist)
+        if result["node"] is None:
+            return None
+        return result["node"], [result["lat"], result["lon"]]
+
+    def route(self, start_node, end_node, weight, zoom=DEFAULT_ZOOM):
+        # dict：path、length、exposure、coords（依 zoom 簡化的 (lat, lon)）
+        return self._get("/route", start=start_node, end=end_node, weight=weight, zoom=zoom)
+
+    def compute_path(self, start_node, end_node, weight):
+        result = self.route(start_node, end_node, weight)
+        return result["path"], result["length"], result["exposure"]
+
+    def route_geometry(self, start_node, end_node, weight, zoom=DEFAULT_ZOOM):
+        return self.route(start_node, end_node, weight, zoom)["coords"]
+
+    def compute_pareto(self, start_node, end_node, k=PARETO_ROUTES, zoom=DEFAULT_ZOOM):
+        # [(path, 總長, 總暴露量, coords)]，依距離遞增
+        result = self._get("/pareto", start=start_node, end=end_node, k=k, zoom=zoom)
+        return [(r["path"], r["length"], r["exposure"], r["coords"]) for r in result["routes"]]
+
+    def compute_alternatives(self, start_node, end_node, weight, k=ALTERNATIVE_ROUTES,
+                             zoom=DEFAULT_ZOOM):
+        # [(path, 總長, 總暴露量, coords)]，第一條為最佳路徑
+        result = self._get("/alternatives", start=start_node, end=end_node, weight=weight, k=k,
+                           zoom=zoom)
+        return [(r["path"], r["length"], r["exposure"], r["coords"]) for r in result["routes"]]
+
+    def compute_isochrone(self, node, mode, minutes):
+        # {"geometry": GeoJSON, "nodes": 節點數, "area_km2": 面積}
+        return self._get("/isochrone", node=node, mode=mode, minutes=minutes)
+
+    def compute_isoexposure(self, node, budget=None, mode=None, minutes=None):
+        # 沒給 budget 時由服務以 mode、minutes 換算，回傳內容另含 budget
+        params = {"budget": budget} if budget is not None else {"mode": mode, "minutes": minutes}
+        return self._get("/isoexposure", node=node, **params)
+
+    def routes(self, pairs, weights=("length", "exposure"), geometry=False):
+        body = {"pairs": [list(map(int, p)) for p in pairs], "weights": list(weights),
+                "geometry": geometry}
+        response = self.session.post(self.base_url + "/routes", json=body, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["routes"]
@@ -0,0 +1,144 @@
+# 逐時 PM2.5 網格換算各邊暴露量：python -m routing.exposure 網格.npz [--step 公尺]
+# 網格檔為 np.savez 存的 grids（時段 × 列 × 欄，第 0 列在北）、extent（TWD97 左、下、右、上，
+# 省略時用疊圖範圍）與選用的 hours（各時段標籤）
+import argparse
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from routing.graph import ARTIFACT_PATH, PKL_PATH, load_graph
+from routing.projection import TWD97, WGS84, transform_coords
+from routing.tiles import PM25_EXTENT_TWD97
+
+SAMPLE_STEP = 10  # 沿邊取樣間距（公尺），需小於網格解析度
+# 暴露量 = scale × Σ(邊落在網格內的長度 × 濃度)；None 表示校準到路網原本 exposure 屬性的量級，
+# 每分鐘暴露量、改善率與 A* 啟發值才與原本一致
+EXPOSURE_SCALE = None
+
+
+# ========== 邊取樣矩陣 ==========
+def edge_segments(G):
+    # 所有邊的 TWD97 線段：(所屬邊 id, 起點, 終點)；沒有幾何的邊以兩端節點連線
+    counts = np.diff(G.geom_offsets)
+    owner = np.repeat(np.arange(G.num_edges), counts)
+    xy = transform_coords(G.geom_coords, WGS84, TWD97)
+    same = np.flatnonzero(owner[:-1] == owner[1:])
+    bare = np.flatnonzero(counts == 0)
+    edge = np.concatenate([owner[same], bare])
+    p0 = np.concatenate([xy[same], G.xy[G.u[bare]]])
+    p1 = np.concatenate([xy[same + 1], G.xy[G.v[bare]]])
+    return edge, p0, p1
+
+
+def sampling_matrix(G, extent, shape, step=SAMPLE_STEP):
+    """回傳 (邊數, 網格數) 的稀疏矩陣，第 e 列為邊 e 在各網格內的長度。
+
+    每段線段切成不超過 step 公尺的小段，以小段中點所在的網格計入；每條邊的列總和
+    正規化成該邊的 length 屬性。落在範圍外的點歸到最近的邊界網格。
+    """
+    left, bottom, right, top = extent
+    rows, cols = shape
+    edge, p0, p1 = edge_segments(G)
+    seg_len = np.hypot(*(p1 - p0).T)
+    n = np.maximum(1, np.ceil(seg_len / step)).astype(np.int64)
+    seg = np.repeat(np.arange(len(n)), n)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n)
+    t = ((k + 0.5) / n[seg])[:, None]
+    pts = p0[seg] + t * (p1[seg] - p0[seg])
+    col = np.clip(np.floor((pts[:, 0] - left) / (right - left) * cols), 0, cols - 1)
+    row = np.clip(np.floor((top - pts[:, 1]) / (top - bottom) * rows), 0, rows - 1)
+    cell = row.astype(np.int64) * cols + col.astype(np.int64)
+
+    sample_edge = edge[seg]
+    w = seg_len[seg] / n[seg]
+    geom_len = np.bincount(sample_edge, weights=w, minlength=G.num_edges)
+    count = np.bincount(sample_edge, minlength=G.num_edges)
+    length = np.maximum(0, G.length)
+    # 幾何長度為 0 的邊（兩端重合）平均分給各取樣點
+    w = np.where(geom_len[sample_edge] > 0,
+                 w * length[sample_edge] / np.where(geom_len > 0, geom_len, 1)[sample_edge],
+                 length[sample_edge] / np.maximum(count, 1)[sample_edge])
+    return csr_matrix((w, (sample_edge, cell)), shape=(G.num_edges, rows * cols))
+
+
+# ========== 單位校準 ==========
+def calibrate_scale(matrix, grids, exposure):
+    """讓所有時段平均濃度算出的總暴露量等於原本 exposure 屬性總和的比例。"""
+    raw = matrix @ grids.mean(axis=0)
+    exposure = np.asarray(exposure, dtype=float)
+    valid = np.isfinite(exposure) & (exposure > 0) & (raw > 0)
+    if not valid.any():
+        return 1.0
+    return float(exposure[valid].sum() / raw[valid].sum())
+
+
+# ========== 逐時暴露量 ==========
+class HourlyExposure:
+    """一疊逐時濃度網格與路網的取樣矩陣；取樣矩陣只建一次，換時段為一次稀疏矩陣乘向量。"""
+
+    def __init__(self, G, grids, extent=PM25_EXTENT_TWD97, hours=None,
+                 step=SAMPLE_STEP, scale=EXPOSURE_SCALE):
+        grids = np.asarray(grids, dtype=float)
+        if grids.ndim == 2:
+            grids = grids[None]
+        self.G = G
+        self.extent = tuple(extent)
+        self.hours = list(hours) if hours is not None else list(range(len(grids)))
+        if len(self.hours) != len(grids):
+            raise ValueError(f"時段標籤 {len(self.hours)} 個，網格 {len(grids)} 張")
+        # 缺值（NaN）以該時段的平均濃度代替，避免路徑偏好沒有資料的區域
+        flat = grids.reshape(len(grids), -1)
+        fill = np.nan_to_num(np.nanmean(np.where(np.isfinite(flat), flat, np.nan), axis=1))
+        self.grids = np.where(np.isfinite(flat), flat, fill[:, None])
+        self.shape = grids.shape[1:]
+        self.step = step
+        self.matrix = sampling_matrix(G, self.extent, self.shape, step)
+        if scale is None:
+            scale = calibrate_scale(self.matrix, self.grids, G.exposure)
+        self.scale = scale
+        self.matrix = self.matrix * scale
+        self.current = None
+
+    @classmethod
+    def load(cls, G, path, step=SAMPLE_STEP, scale=EXPOSURE_SCALE):
+        with np.load(path, allow_pickle=False) as data:
+            extent = data["extent"].tolist() if "extent" in data else PM25_EXTENT_TWD97
+            hours = data["hours"].tolist() if "hours" in data else None
+            return cls(G, data["grids"], extent, hours, step, scale)
+
+    def exposure(self, hour):
+        # 該時段各邊的暴露量；路網新增過邊時取樣矩陣重建
+        if self.matrix.shape[0] != self.G.num_edges:
+            self.matrix = sampling_matrix(self.G, self.extent, self.shape, self.step) * self.scale
+        return self.matrix @ self.grids[self.hours.index(hour)]
+
+    def apply(self, hour):
+        # 把路網的 exposure 換成該時段，路徑快取與收縮階層隨之失效
+        self.G.set_weight("exposure", self.exposure(hour))
+        self.current = hour
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="建立邊取樣矩陣並量測逐時更新暴露量的時間")
+    parser.add_argument("grids")
+    parser.add_argument("--step", type=float, default=SAMPLE_STEP)
+    parser.add_argument("--pkl", default=PKL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    args = parser.parse_args(argv)
+
+    G = load_graph(args.pkl, args.artifact)
+    t0 = time.perf_counter()
+    hourly = HourlyExposure.load(G, args.grids, args.step)
+    print(f"取樣矩陣：{G.num_edges} 條邊 × {hourly.matrix.shape[1]} 格，"
+          f"{hourly.matrix.nnz} 個非零值，{time.perf_counter() - t0:.2f} 秒")
+    print(f"暴露量換算比例：{hourly.scale:.4g}（公尺 × µg/m³ → exposure 屬性單位）")
+    G.csr("exposure")
+    for hour in hourly.hours:
+        t0 = time.perf_counter()
+        hourly.apply(hour)
+        print(f"{hour}：{(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import shapely
+
+from routing.projection import lonlat_to_latlon
+
+# ========== 系統參數 ==========
+DEFAULT_ZOOM = 13
+COORD_DECIMALS = 6  # 約 0.1 公尺，足夠地圖顯示
+
+
+# ========== 路徑幾何 ==========
+def path_coords(G, path, edges=None):
+    """把路徑上每條邊的幾何依行進方向接成一條 (lat, lon) 座標陣列。
+
+    edges 為搜尋實際走的邊 id（有平行邊時幾何才會對上）；沒給時取 length 最短的那條。
+    """
+    if path is None or len(path) == 0:
+        return np.empty((0, 2))
+    if edges is None:
+        edges = G.path_edges(path, "length")
+    parts = [G.latlon[[path[0]]]]
+    for u, v, e in zip(path[:-1], path[1:], edges):
+        start, end = G.geom_offsets[e], G.geom_offsets[e + 1]
+        if start == end:
+            parts.append(G.latlon[[v]])
+            continue
+        coords = lonlat_to_latlon(G.geom_coords[start:end])
+        # 幾何方向不一定與行進方向相同，以離起點較近的一端為頭
+        head = np.abs(coords[0] - G.latlon[u]).sum()
+        tail = np.abs(coords[-1] - G.latlon[u]).sum()
+        if tail < head:
+            coords = coords[::-1]
+        parts.append(coords[1:])
+    return np.concatenate(parts)
+
+
+def zoom_tolerance(zoom):
+    # 該縮放層級下約半個像素的經緯度寬度（256px 圖磚）
+    return 360 / (256 * 2 ** zoom) / 2
+
+
+def simplify_coords(coords, tolerance):
+    if len(coords) < 3 or tolerance <= 0:
+        return coords
+    line = shapely.LineString(coords).simplify(tolerance, preserve_topology=False)
+    return shapely.get_coordinates(line)
+
+
+def route_latlon(G, path, zoom=DEFAULT_ZOOM, edges=None):
+    # 合併、依縮放層級簡化並四捨五入後的座標串列，直接給單一 folium.PolyLine
+    coords = simplify_coords(path_coords(G, path, edges), zoom_tolerance(zoom))
+    return np.round(coords, COORD_DECIMALS).tolist()
@@ -0,0 +1,150 @@
+import logging
+import os
+import pickle
+import time
+
+from routing import metrics
+from routing.alternatives import ALTERNATIVE_ROUTES, alternative_routes
+from routing.artifact import load_artifact
+from routing.geometry import DEFAULT_ZOOM, route_latlon
+from routing.isochrone import ISO_METHOD, isochrone, isoexposure
+from routing.network import RoadNetwork
+from routing.pareto import PARETO_ROUTES, pareto_routes
+from routing.search import search_edges
+from routing.spatial import MAX_SNAP_DIST
+
+PKL_PATH = r"data/Tai_Road_濃度_最大連通版.pkl"
+ARTIFACT_PATH = r"data/Tai_Road_濃度_最大連通版"  # python -m routing.build 產生
+PARTITIONS = os.environ.get("ROUTING_PARTITIONS")  # 分區資料夾，設定時改為分區載入，見 routing.partition
+SEARCH_MODE = "auto"  # 收縮階層量測較快時用 "ch"，其他模式見 routing.search.SEARCH_MODES
+
+logger = logging.getLogger(__name__)
+
+
+# ========== 讀取圖 ==========
+def load_graph(pkl_path=PKL_PATH, artifact_path=ARTIFACT_PATH, partition_path=PARTITIONS):
+    # 優先 mmap 預先建好的二進位檔（多個行程共用同一份頁面），沒有時才讀 pickle；
+    # 有 partition_path 時只讀分區索引，分區在查詢碰到時才載入；
+    # 實際讀了哪一種記在 net.loaded_from（"partitions"、"artifact" 或 "pickle"）
+    t0 = time.perf_counter()
+    if partition_path:
+        from routing.partition import PartitionedNetwork  # routing.partition 也 import 本模組
+        net = PartitionedNetwork(partition_path)
+        net.loaded_from = "partitions"
+    elif artifact_path and os.path.isdir(artifact_path):
+        net = load_artifact(artifact_path)
+        net.loaded_from = "artifact"
+    else:
+        if artifact_path:
+            logger.warning("找不到路網二進位檔 %s，改讀 pickle（較慢，且無法跨行程共用記憶體）；"
+                           "請先執行 python -m routing.build", artifact_path)
+        with open(pkl_path, "rb") as f:
+            G = pickle.load(f)
+        net = RoadNetwork.from_graph(G)
+        net.loaded_from = "pickle"
+    net.load_seconds = time.perf_counter() - t0
+    return net
+
+
+# ========== 找最近節點 ==========
+def find_nearest_node(G, lat, lon, max_dist=MAX_SNAP_DIST):
+    # 回傳節點 id；max_dist 單位為公尺（TWD97）
+    with metrics.span("find_nearest_node"):
+        return G.index.nearest(lat, lon, max_dist)
+
+
+# ========== 路徑計算 ==========
+def compute_path(G, start_node, end_node, weight, mode=SEARCH_MODE):
+    # 同一組起終點與權重只搜尋一次，地圖平移/縮放重跑時直接取快取
+    with metrics.span("compute_path"):
+        return _cached_route(G, start_node, end_node, weight, mode)[:3]
+
+
+def _cached_route(G, start_node, end_node, weight, mode=SEARCH_MODE):
+    # (path, 總長, 總暴露量, 邊 id)；邊 id 與路徑出自同一次搜尋，組幾何時不必再查一次
+    key = (start_node, end_node, weight, G.version, mode)
+    return G.route_cache.get_or_compute(
+        key, lambda: _search_path(G, start_node, end_node, weight, mode)
+    )
+
+
+def _search_path(G, start_node, end_node, weight, mode):
+    # 只有快取沒命中才會進來，計數即為實際搜尋次數
+    metrics.count("route_searches")
+    with metrics.span("search"):
+        if G.partitioned:
+            view = G
+            path, edges, settled = G.search_edges(start_node, end_node, weight)
+        else:
+            # 搜尋、查邊 id 與加總都用同一份快照，背景更新換掉路網陣列也不會混用
+            view = G.view(weight)
+            path, edges, settled = search_edges(G, start_node, end_node, weight, mode, view)
+    metrics.count("nodes_settled", settled)
+    if path is None:
+        return None, 0, 0, None
+    # 總長與總暴露量直接由搜尋選到的邊加總，平行邊只算實際走的那條
+    with metrics.span("path_totals"):
+        total, exposure = view.edge_totals(edges)
+    return path.tolist(), total, exposure, edges
+
+
+def _whole_graph(G, feature):
+    # 權衡路徑、替代路徑與可達範圍要在整張圖上搜尋，分區載入時不支援
+    if G.partitioned:
+        raise ValueError(f"分區載入模式不支援{feature}")
+
+
+def compute_pareto(G, start_node, end_node, k=PARETO_ROUTES):
+    # 距離與暴露量的權衡路徑 [(path, 總長, 總暴露量)]，依距離遞增
+    _whole_graph(G, "權衡路徑")
+    key = (start_node, end_node, "pareto", G.version, k)
+    with metrics.span("compute_pareto"):
+        return G.route_cache.get_or_compute(
+            key, lambda: pareto_routes(G, start_node, end_node, k)
+        )
+
+
+def compute_alternatives(G, start_node, end_node, weight, k=ALTERNATIVE_ROUTES):
+    # 同一權重的替代路徑 [(path, 總長, 總暴露量)]，第一條即 compute_path 的結果
+    _whole_graph(G, "替代路徑")
+    key = (start_node, end_node, weight, G.version, "alternatives", k)
+    with metrics.span("compute_alternatives"):
+        return G.route_cache.get_or_compute(
+            key, lambda: alternative_routes(G, start_node, end_node, weight, k)
+        )
+
+
+# ========== 可達範圍 ==========
+def compute_isochrone(G, node, mode, minutes, method=ISO_METHOD):
+    # 等時圈，依 (節點, 交通方式, 分鐘) 快取
+    _whole_graph(G, "等時圈")
+    key = (node, "isochrone", mode, minutes, method, G.version)
+    with metrics.span("compute_isochrone"):
+        return G.route_cache.get_or_compute(key, lambda: isochrone(G, node, mode, minutes, method))
+
+
+def compute_isoexposure(G, node, budget, method=ISO_METHOD):
+    # 等暴露範圍，依 (節點, 暴露量預算) 快取
+    _whole_graph(G, "等暴露範圍")
+    key = (node, "isoexposure", budget, method, G.version)
+    with metrics.span("compute_isoexposure"):
+        return G.route_cache.get_or_compute(key, lambda: isoexposure(G, node, budget, method))
+
+
+# ========== 路徑幾何 ==========
+def route_geometry(G, start_node, end_node, weight, zoom=DEFAULT_ZOOM):
+    # 合併後的路徑線段與路徑結果一起快取，重跑時不必重新組幾何
+    key = (start_node, end_node, weight, G.version, "geometry", zoom)
+    with metrics.span("route_geometry"):
+        return G.route_cache.get_or_compute(
+            key, lambda: _path_latlon(G, *_cached_route(G, start_node, end_node, weight)[::3], zoom)
+        )
+
+
+def _path_latlon(G, path, edges, zoom):
+    if path is None:
+        return []
+    if G.partitioned:
+        # 分區路網沒有整張圖的幾何陣列，先組出只含這條路徑的小路網
+        G, path, edges = G.path_network(path, edges)
+    return route_latlon(G, path, zoom, edges)
@@ -0,0 +1,99 @@
+import numpy as np
+import shapely
+from scipy.sparse.csgraph import dijkstra
+
+from routing.projection import TWD97, WGS84, transform_coords
+from routing.stats import SPEEDS
+
+ISO_METHODS = ("hull", "buffer")
+ISO_METHOD = "hull"  # hull：凹包，大範圍也快；buffer：沿路段外擴，貼近路網但範圍大時慢
+ISO_BUFFER = 30  # 外擴距離（公尺）
+ISO_HULL_RATIO = 0.1  # shapely.concave_hull 的 ratio，越小越貼近點群
+ISO_SIMPLIFY = 10  # 輸出前的簡化容許誤差（公尺）
+
+
+# ========== 單源有界 Dijkstra ==========
+def reach(G, source, weight, budget):
+    """從 source 出發、成本不超過 budget 的各節點成本；到不了或超出的為 inf。"""
+    matrix, _ = G.csr(weight)
+    return dijkstra(matrix, directed=True, indices=source, limit=budget)
+
+
+def _sides(G):
+    # 邊的行進方向：無向圖兩個方向都可以走
+    if G.directed:
+        return [(G.u, G.v)]
+    return [(G.u, G.v), (G.v, G.u)]
+
+
+def reached_segments(G, dist, weight, budget):
+    """可到達的路段（TWD97 直線段，(N, 2, 2)）：整條走得完的邊，加上邊界上走到一半的部分。
+
+    另回傳各段是否只走到一半的布林陣列，其終點即範圍邊界上的點。
+    """
+    w = G.weight_array(weight)
+    parts, partial = [], []
+    for a, b in _sides(G):
+        da = dist[a]
+        ok = np.isfinite(w) & (da <= budget)
+        # 走到 b 之前就用完預算的只取前段，依成本比例在直線上內插
+        frac = np.ones(len(w))
+        cut = ok & (da + w > budget) & (w > 0)
+        frac[cut] = (budget - da[cut]) / w[cut]
+        start, end = G.xy[a[ok]], G.xy[b[ok]]
+        parts.append(np.stack([start, start + frac[ok][:, None] * (end - start)], axis=1))
+        partial.append(frac[ok] < 1)
+    return np.concatenate(parts), np.concatenate(partial)
+
+
+# ========== 可達範圍 ==========
+def reachable_area(G, source, weight, budget, method=ISO_METHOD):
+    """成本不超過 budget 的可達範圍：{"geometry": GeoJSON（經緯度）, "nodes": 節點數, "area_km2": 面積}。"""
+    if method not in ISO_METHODS:
+        raise ValueError(f"未知的範圍計算方式：{method}")
+    if not np.isfinite(budget) or budget < 0:
+        raise ValueError(f"預算須為不小於 0 的有限數值：{budget}")
+    dist = reach(G, source, weight, budget)
+    segments, partial = reached_segments(G, dist, weight, budget)
+    if method == "hull":
+        # 可到達的節點加上邊界上的半途點；整條走完的邊兩端都是節點，不必重複放
+        points = np.concatenate([G.xy[np.isfinite(dist)], segments[partial, 1]])
+        area = shapely.concave_hull(shapely.multipoints(points), ratio=ISO_HULL_RATIO)
+        area = area.buffer(ISO_BUFFER, quad_segs=2)
+    else:
+        lines = shapely.line_merge(shapely.multilinestrings(shapely.linestrings(segments)))
+        area = shapely.union(lines.buffer(ISO_BUFFER, quad_segs=2),
+                             shapely.Point(G.xy[source]).buffer(ISO_BUFFER, quad_segs=2))
+    area = area.simplify(ISO_SIMPLIFY)
+    lonlat = shapely.transform(area, lambda xy: transform_coords(xy, TWD97, WGS84))
+    return {
+        "geometry": shapely.geometry.mapping(lonlat),
+        "nodes": int(np.isfinite(dist).sum()),
+        "area_km2": float(area.area / 1e6),
+    }
+
+
+def mode_distance(mode, minutes):
+    # 該交通方式 minutes 分鐘可走的距離（公尺）
+    if mode not in SPEEDS:
+        raise ValueError(f"未知的交通方式：{mode}")
+    if not np.isfinite(minutes) or minutes < 0:
+        raise ValueError(f"分鐘數須為不小於 0 的有限數值：{minutes}")
+    return SPEEDS[mode] * 1000 / 60 * minutes
+
+
+def isochrone(G, source, mode, minutes, method=ISO_METHOD):
+    # 等時圈：依交通方式速度換成距離預算
+    return reachable_area(G, source, "length", mode_distance(mode, minutes), method)
+
+
+def exposure_budget(G, mode, minutes):
+    """全路網平均濃度下走 minutes 分鐘累積的暴露量，作為等暴露範圍的預設預算。"""
+    finite = np.isfinite(G.exposure) & ~G.closed
+    mean = G.exposure[finite].sum() / max(G.length[finite].sum(), 1e-9)
+    return float(mean * mode_distance(mode, minutes))
+
+
+def isoexposure(G, source, budget, method=ISO_METHOD):
+    # 等暴露範圍：累積暴露量不超過 budget 的地方
+    return reachable_area(G, source, "exposure", budget, method)
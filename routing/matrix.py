@@ -0,0 +1,113 @@
+# 多對多距離／暴露矩陣：
+# python -m routing.matrix 起點.csv 終點.csv 輸出資料夾 [--chunk-size N]
+# 起終點檔需有 lat, lon 欄位；輸出為可 mmap 的 .npy（列：起點、欄：終點）
+import argparse
+import os
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from scipy.sparse.csgraph import dijkstra
+
+from routing.graph import ARTIFACT_PATH, PKL_PATH, load_graph
+from routing.spatial import MAX_SNAP_DIST
+
+CHUNK_SIZE = 32  # 每批同時搜尋的起點數，控制 (批次 × 節點數) 的暫存陣列大小
+# 矩陣名稱：{路徑種類}_{累計屬性}
+MATRICES = {
+    "shortest_length": ("length", "length"),
+    "shortest_exposure": ("length", "exposure"),
+    "lowexp_length": ("exposure", "length"),
+    "lowexp_exposure": ("exposure", "exposure"),
+}
+
+
+# ========== 最短路徑樹累計 ==========
+def tree_sums(G, weight, pred, attr):
+    """沿單源最短路徑樹（predecessor 陣列）累計每條邊的 attr，回傳起點到各節點的總和。
+
+    以倍增法（pointer jumping）向量化，迭代次數約為 log2(樹深)。
+    """
+    node = np.flatnonzero(pred >= 0)
+    val = np.zeros(len(pred))
+    val[node] = attr[G.csr_edges(weight, pred[node], node)]
+    anc = np.where(pred >= 0, pred, -1)
+    while True:
+        has = np.flatnonzero(anc >= 0)
+        if len(has) == 0:
+            break
+        up = anc[has]
+        val[has] += val[up]
+        anc[has] = anc[up]
+    val[(pred < 0)] = np.nan
+    return val
+
+
+# ========== 矩陣計算 ==========
+def route_matrices(G, origins, destinations, out_dir=None, chunk_size=CHUNK_SIZE):
+    """每個起點各跑一次 length 與 exposure 單源搜尋，一次讀出所有終點。
+
+    回傳 {名稱: (起點數, 終點數) 陣列}；給 out_dir 時直接寫入 mmap 的 .npy，記憶體只留一批。
+    起點本身的值為 0，無法到達為 NaN。
+    """
+    origins = np.asarray(origins, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+    shape = (len(origins), len(destinations))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        out = {name: open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                 dtype=np.float64, shape=shape) for name in MATRICES}
+    else:
+        out = {name: np.empty(shape) for name in MATRICES}
+
+    for start in range(0, len(origins), chunk_size):
+        chunk = origins[start:start + chunk_size]
+        for weight in ("length", "exposure"):
+            matrix, _ = G.csr(weight)
+            _, pred = dijkstra(matrix, directed=True, indices=chunk, return_predecessors=True)
+            for row, (o, p) in enumerate(zip(chunk, pred)):
+                for name, (search, attr) in MATRICES.items():
+                    if search != weight:
+                        continue
+                    sums = tree_sums(G, weight, p, getattr(G, attr))
+                    sums[o] = 0
+                    out[name][start + row] = sums[destinations]
+        if out_dir:
+            for arr in out.values():
+                arr.flush()
+    return out
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="計算起終點集合間的距離與暴露矩陣")
+    parser.add_argument("origins")
+    parser.add_argument("destinations")
+    parser.add_argument("out_dir")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--pkl", default=PKL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    parser.add_argument("--max-dist", type=float, default=MAX_SNAP_DIST)
+    args = parser.parse_args(argv)
+
+    G = load_graph(args.pkl, args.artifact)
+    nodes = {}
+    for name in ("origins", "destinations"):
+        df = pd.read_csv(getattr(args, name))
+        idx, _ = G.index.snap(df["lat"].to_numpy(), df["lon"].to_numpy(), args.max_dist)
+        if (idx < 0).any():
+            raise SystemExit(f"⚠️ {name} 第 {np.flatnonzero(idx < 0).tolist()} 筆離路網太遠")
+        nodes[name] = idx
+    os.makedirs(args.out_dir, exist_ok=True)
+    np.save(os.path.join(args.out_dir, "origin_nodes.npy"), nodes["origins"])
+    np.save(os.path.join(args.out_dir, "destination_nodes.npy"), nodes["destinations"])
+
+    t0 = time.perf_counter()
+    route_matrices(G, nodes["origins"], nodes["destinations"], args.out_dir, args.chunk_size)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ {len(nodes['origins'])} × {len(nodes['destinations'])} 矩陣，{elapsed:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# 行程記憶體用量：Linux 讀 /proc/<pid>/smaps_rollup，分得出 mmap 共用頁面與私有記憶體
+import os
+
+
+def memory_usage(pid="self"):
+    """回傳 MB 為單位的 dict：rss、pss（共用頁面依共用行程數分攤）、shared、private。
+
+    沒有 /proc 的平台只回傳本行程的最大 RSS。
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        import resource
+
+        return {"rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    kb = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                kb[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": kb.get("Rss", 0) / 1024,
+        "pss_mb": kb.get("Pss", 0) / 1024,
+        "shared_mb": (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) / 1024,
+        "private_mb": (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024,
+    }
@@ -0,0 +1,145 @@
+# 熱路徑計時與計數：設定 ROUTING_METRICS=1 才啟用，關閉時 span() 只回傳共用的空 context
+# 彙總值可輸出成 Prometheus 文字格式（routing.service 的 /metrics），
+# 每次操作的明細（trace）結束時以 JSON 寫到 logging 的 routing.metrics
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # 直方圖上界（秒）
+
+logger = logging.getLogger("routing.metrics")
+_enabled = os.environ.get("ROUTING_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_spans = {}  # 名稱 → {"buckets": [...], "count": n, "sum": 秒}
+_counters = {}
+_trace = contextvars.ContextVar("routing_trace", default=None)
+_NULL = nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+    _setup_logging()
+
+
+def _setup_logging():
+    # 外部沒設定 logging 時，trace 每筆一行 JSON 寫到 stderr
+    if _enabled and not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+
+# ========== 計時與計數 ==========
+def span(name):
+    """with span("compute_path"): ... 記錄耗時；關閉時幾乎沒有成本。"""
+    if not _enabled:
+        return _NULL
+    return _timed(name)
+
+
+@contextmanager
+def _timed(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - t0)
+
+
+def _record(name, seconds):
+    with _lock:
+        h = _spans.get(name)
+        if h is None:
+            h = _spans[name] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0}
+        for i, upper in enumerate(BUCKETS):
+            if seconds <= upper:
+                h["buckets"][i] += 1
+        h["count"] += 1
+        h["sum"] += seconds
+    trace = _trace.get()
+    if trace is not None:
+        trace["spans"].append((name, seconds))
+
+
+def count(name, value=1):
+    # 例如搜尋定案的節點數、地圖上的線段數
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    trace = _trace.get()
+    if trace is not None:
+        trace["counters"][name] = trace["counters"].get(name, 0) + value
+
+
+# ========== 單次操作明細 ==========
+def start_trace(label="", resume=None):
+    """開始記錄這次操作的明細；resume 為上次沒結束的 trace（例如中途 st.rerun）時接著記。"""
+    if not _enabled:
+        return None
+    if resume is not None and "total_s" not in resume:
+        trace = resume
+    else:
+        trace = {"label": label, "start": time.time(), "spans": [], "counters": {}}
+    _trace.set(trace)
+    return trace
+
+
+def finish_trace():
+    # 結束並寫一筆結構化 log，回傳 trace
+    trace = _trace.get()
+    _trace.set(None)
+    if trace is None:
+        return None
+    trace["total_s"] = time.time() - trace["start"]
+    logger.info(json.dumps(trace, ensure_ascii=False))
+    return trace
+
+
+def breakdown(trace):
+    # 依名稱加總 trace 裡的耗時：[(名稱, 次數, 毫秒)]，依毫秒遞減
+    totals = {}
+    for name, seconds in trace["spans"]:
+        n, s = totals.get(name, (0, 0.0))
+        totals[name] = (n + 1, s + seconds)
+    return sorted(((k, n, s * 1000) for k, (n, s) in totals.items()), key=lambda r: -r[2])
+
+
+# ========== 匯出 ==========
+def snapshot():
+    with _lock:
+        return {"spans": {k: dict(v, buckets=list(v["buckets"])) for k, v in _spans.items()},
+                "counters": dict(_counters)}
+
+
+def prometheus_text():
+    """Prometheus 文字格式：routing_span_seconds 直方圖與 routing_<名稱>_total 計數器。"""
+    data = snapshot()
+    lines = ["# TYPE routing_span_seconds histogram"]
+    for name, h in sorted(data["spans"].items()):
+        for upper, n in zip(BUCKETS, h["buckets"]):
+            lines.append(f'routing_span_seconds_bucket{{span="{name}",le="{upper}"}} {n}')
+        lines.append(f'routing_span_seconds_bucket{{span="{name}",le="+Inf"}} {h["count"]}')
+        lines.append(f'routing_span_seconds_sum{{span="{name}"}} {h["sum"]}')
+        lines.append(f'routing_span_seconds_count{{span="{name}"}} {h["count"]}')
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"# TYPE routing_{name}_total counter")
+        lines.append(f"routing_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+_setup_logging()
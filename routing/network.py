@@ -0,0 +1,391 @@
+import copy
+import threading
+
+import numpy as np
+import shapely
+from scipy.sparse import csr_matrix
+
+from routing.cache import RouteCache
+from routing.projection import lonlat_to_latlon, twd97_to_latlon
+from routing.search import search
+from routing.spatial import NodeIndex
+
+WEIGHTS = ("length", "exposure")
+
+
+# ========== 邊屬性 ==========
+def edge_attrs(d):
+    # 原始 pickle 以 add_edge(..., attr_dict={...}) 建立，屬性包在 attr_dict 裡
+    return d.get("attr_dict", {})
+
+
+# ========== CSR 位置 → 邊 id ==========
+def csr_keys(matrix):
+    # CSR 依 (起點, 終點) 排序，起點 * N + 終點 即為遞增鍵值
+    src = np.repeat(np.arange(matrix.shape[0], dtype=np.int64), np.diff(matrix.indptr))
+    return src * matrix.shape[0] + matrix.indices
+
+
+def lookup_edges(keys, eid, num_nodes, a, b):
+    """整批查 (a, b) 在 CSR 裡的邊 id；keys 由 csr_keys 算出，eid 為 build_csr 回傳的對照。
+
+    任一組 (a, b) 在 CSR 裡沒有邊時丟出 KeyError，不回傳相鄰位置的邊。
+    """
+    query = np.asarray(a, dtype=np.int64) * num_nodes + np.asarray(b, dtype=np.int64)
+    pos = np.searchsorted(keys, query)
+    found = pos < len(keys)
+    found[found] = keys[pos[found]] == query[found]
+    if not found.all():
+        miss = np.flatnonzero(~np.atleast_1d(found))[0]
+        a, b = np.atleast_1d(a)[miss], np.atleast_1d(b)[miss]
+        raise KeyError(f"{a} → {b} 之間沒有邊")
+    return eid[pos]
+
+
+# ========== 一致的唯讀快照 ==========
+class NetworkView:
+    """路網某一版本在某個權重下的唯讀快照：CSR、邊 id 對照、CSR 鍵值與每邊數值。
+
+    背景更新是換掉 RoadNetwork 的陣列而不是原地修改；搜尋從頭到尾只讀同一份快照，
+    不會讀到一半新、一半舊的結構。
+    """
+
+    def __init__(self, matrix, eid, xy, u, v, length, exposure, weights, keys=None):
+        self.matrix = matrix
+        self.eid = eid
+        self._keys = keys
+        self.xy = xy
+        self.u = u
+        self.v = v
+        self.length = length
+        self.exposure = exposure
+        self.weights = weights  # weight_array 的結果：負值為 0，封閉路段為無限大
+        self._lists = {}
+        self._scale = None
+
+    @property
+    def num_nodes(self):
+        return self.matrix.shape[0]
+
+    @property
+    def keys(self):
+        # 第一次查邊 id 時才算，載入 mmap 的 CSR 不必先掃過一遍
+        if self._keys is None:
+            self._keys = csr_keys(self.matrix)
+        return self._keys
+
+    def edges(self, a, b):
+        # 整批查 (a, b) 實際使用的邊 id（平行邊中權重最小者）
+        return lookup_edges(self.keys, self.eid, self.num_nodes, a, b)
+
+    def path_edges(self, path):
+        path = np.asarray(path, dtype=np.int64)
+        if len(path) < 2:
+            return np.empty(0, dtype=np.int32)
+        return self.edges(path[:-1], path[1:])
+
+    def edge_totals(self, edges):
+        return float(self.length[edges].sum()), float(self.exposure[edges].sum())
+
+    def with_values(self, length, exposure):
+        # CSR 不變、只換另一個權重的每邊數值時，共用矩陣與已建好的鄰接串列
+        view = copy.copy(self)
+        view.length, view.exposure = length, exposure
+        return view
+
+    # ========== 純 Python 搜尋用的結構 ==========
+    def adjacency_lists(self, reverse=False):
+        # heapq 搜尋逐一讀取元素，Python list 比 NumPy 純量索引快得多
+        lists = self._lists.get(reverse)
+        if lists is None:
+            matrix = self.matrix.T.tocsr() if reverse else self.matrix
+            lists = self._lists[reverse] = (matrix.indptr.tolist(), matrix.indices.tolist(),
+                                            matrix.data.tolist())
+        return lists
+
+    def xy_lists(self):
+        lists = self._lists.get("xy")
+        if lists is None:
+            lists = self._lists["xy"] = (self.xy[:, 0].tolist(), self.xy[:, 1].tolist())
+        return lists
+
+    def heuristic_scale(self):
+        """全圖最小的「權重 / 端點直線距離」，乘上直線距離即為可接受的 A* 啟發值。"""
+        if self._scale is None:
+            straight = np.hypot(*(self.xy[self.u] - self.xy[self.v]).T)
+            has = straight > 0
+            scale = float((self.weights[has] / straight[has]).min()) if has.any() else 0.0
+            # 預留浮點誤差，確保縮減成本不會是負值
+            self._scale = scale * (1 - 1e-9)
+        return self._scale
+
+
+# ========== 陣列式路網 ==========
+class RoadNetwork:
+    """節點編成整數 id、邊屬性與幾何存成 NumPy 陣列的路網，供 CSR Dijkstra 使用。
+
+    xy 為 TWD97 (EPSG:3826) 座標，latlon 為 WGS84；邊幾何以 (lon, lat) 打包在
+    geom_coords，第 e 條邊為 geom_coords[geom_offsets[e]:geom_offsets[e + 1]]。
+    """
+
+    partitioned = False  # 分區載入的路網見 routing.partition.PartitionedNetwork
+
+    def __init__(self, xy, u, v, length, exposure, geom_offsets=None, geom_coords=None,
+                 latlon=None, directed=False, adjacency=None):
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        self.u = np.asarray(u, dtype=np.int32)
+        self.v = np.asarray(v, dtype=np.int32)
+        self.length = np.asarray(length, dtype=float)
+        self.exposure = np.asarray(exposure, dtype=float)
+        if geom_offsets is None:
+            geom_offsets = np.zeros(len(self.u) + 1, dtype=np.int64)
+            geom_coords = np.empty((0, 2))
+        self.geom_offsets = geom_offsets
+        self.geom_coords = geom_coords
+        self.latlon = latlon if latlon is not None else twd97_to_latlon(self.xy)
+        self.directed = directed
+        self.adjacency = adjacency if adjacency is not None else self._build_adjacency()
+        self.closed = np.zeros(len(self.u), dtype=bool)  # 封閉路段，搜尋時略過
+        self.index = NodeIndex(self.xy)
+        self.version = 0
+        self.route_cache = RouteCache()
+        self.ch = {}  # 權重 → ContractionHierarchy，見 routing.ch
+        self.applied_updates = set()  # 已套用的 delta 檔名，見 routing.update
+        self.load_seconds = None  # load_graph 的載入秒數
+        self.loaded_from = None  # load_graph 實際讀的來源
+        self._views = {}  # 權重 → NetworkView
+        self._lock = threading.RLock()  # 更新路網陣列與建立快照互斥，快照才會前後一致
+        self._nodes = None
+
+    @classmethod
+    def from_graph(cls, G):
+        nodes = list(G.nodes)
+        node_id = {n: i for i, n in enumerate(nodes)}
+        edges = G.edges(keys=True, data=True) if G.is_multigraph() else G.edges(data=True)
+        u, v, length, exposure, geometry = [], [], [], [], []
+        for e in edges:
+            attrs = edge_attrs(e[-1])
+            u.append(node_id[e[0]])
+            v.append(node_id[e[1]])
+            length.append(attrs.get("length", 0))
+            exposure.append(attrs.get("exposure", 0))
+            geometry.append(attrs.get("geometry"))
+        coords, owner = shapely.get_coordinates(
+            np.array(geometry, dtype=object), return_index=True
+        )
+        geom_offsets = np.zeros(len(u) + 1, dtype=np.int64)
+        geom_offsets[1:] = np.cumsum(np.bincount(owner, minlength=len(u)))
+        return cls(nodes, u, v, length, exposure, geom_offsets, coords,
+                   directed=G.is_directed())
+
+    @property
+    def num_nodes(self):
+        return len(self.xy)
+
+    @property
+    def num_edges(self):
+        return len(self.u)
+
+    @property
+    def nodes(self):
+        # 原始 pickle 的節點鍵即為 TWD97 座標 tuple
+        if self._nodes is None:
+            self._nodes = list(map(tuple, self.xy.tolist()))
+        return self._nodes
+
+    def weight_array(self, weight):
+        # 與原本 nx 權重函式相同：負值視為 0；封閉路段為無限大
+        w = np.maximum(0, getattr(self, weight))
+        if self.closed.any():
+            w = np.where(self.closed, np.inf, w)
+        return w
+
+    def edge_latlon(self, e):
+        # 邊幾何轉成 folium 使用的 (lat, lon)；沒有幾何時以兩端節點連線
+        start, end = self.geom_offsets[e], self.geom_offsets[e + 1]
+        if start == end:
+            return self.latlon[[self.u[e], self.v[e]]].tolist()
+        return lonlat_to_latlon(self.geom_coords[start:end]).tolist()
+
+    # ========== 鄰接表 ==========
+    def _build_adjacency(self):
+        # 含所有平行邊的 CSR：(indptr, 鄰點, 邊 id)，無向圖兩個方向都放
+        src, dst, eid = self.u, self.v, np.arange(self.num_edges, dtype=np.int32)
+        if not self.directed:
+            src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+            eid = np.concatenate([eid, eid])
+        order = np.lexsort((dst, src))
+        indptr = np.searchsorted(src[order], np.arange(self.num_nodes + 1)).astype(np.int32)
+        return indptr, dst[order], eid[order]
+
+    def edges_between(self, a, b):
+        # a → b 之間未封閉的邊
+        indptr, indices, eid = self.adjacency
+        row = slice(indptr[a], indptr[a + 1])
+        edges = eid[row][indices[row] == b]
+        return edges[~self.closed[edges]]
+
+    def path_edges(self, path, weight):
+        """路徑每一步實際走的邊 id：平行邊取該權重下最便宜的那條，與搜尋時的選擇一致。"""
+        path = np.asarray(path, dtype=np.int64)
+        if len(path) < 2:
+            return np.empty(0, dtype=np.int32)
+        return self.csr_edges(weight, path[:-1], path[1:])
+
+    def edge_totals(self, edges):
+        # 一組邊 id 的總長與總暴露量
+        return float(self.length[edges].sum()), float(self.exposure[edges].sum())
+
+    def path_totals(self, path, weight="length"):
+        # 只有節點路徑時，依 weight 決定平行邊走哪一條再加總
+        return self.edge_totals(self.path_edges(path, weight))
+
+    # ========== CSR 權重矩陣 ==========
+    def view(self, weight):
+        """目前版本在該權重下的 NetworkView；一次搜尋只取一次，之後都讀這份。"""
+        view = self._views.get(weight)
+        if view is None:
+            # 在鎖內讀路網陣列，不會碰上更新執行緒換到一半
+            with self._lock:
+                view = self._views.get(weight)
+                if view is None:
+                    w = self.weight_array(weight)
+                    view = self._views[weight] = self._new_view(w, *self.build_csr(w))
+        return view
+
+    def _new_view(self, weights, matrix, eid, keys=None):
+        return NetworkView(matrix, eid, self.xy, self.u, self.v, self.length, self.exposure,
+                           weights, keys)
+
+    def csr(self, weight):
+        """回傳 (csr_matrix, CSR 位置對應的邊 id)，平行邊只保留權重最小者。"""
+        view = self.view(weight)
+        return view.matrix, view.eid
+
+    def build_csr(self, edge_weight):
+        # 以任意每邊權重（例如 length 與 exposure 的線性組合）建立 CSR，不快取
+        indptr, dst, eid = self.adjacency
+        src = np.repeat(np.arange(self.num_nodes), np.diff(indptr))
+        w = np.asarray(edge_weight, dtype=float)[eid]
+        order = np.lexsort((w, dst, src))
+        src, dst, w, eid = src[order], dst[order], w[order], eid[order]
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        keep &= np.isfinite(w)  # 封閉路段（或 0 × inf 產生的 NaN）不進 CSR
+        src, dst, w, eid = src[keep], dst[keep], w[keep], eid[keep]
+        indptr = np.searchsorted(src, np.arange(self.num_nodes + 1)).astype(np.int32)
+        # 直接以 (data, indices, indptr) 建構，保留權重為 0 的邊
+        matrix = csr_matrix((w, dst, indptr), shape=(self.num_nodes, self.num_nodes))
+        return matrix, eid
+
+    def csr_edges(self, weight, a, b):
+        """整批查 (a, b) 在該權重 CSR 裡實際使用的邊 id（平行邊中權重最小者）。"""
+        return self.view(weight).edges(a, b)
+
+    # ========== 更新權重 ==========
+    def set_weight(self, weight, values):
+        """整批換掉某個權重的每邊數值（例如換時段的 exposure），不重建路網。
+
+        沒有平行邊時 CSR 結構與權重無關，只換 data 陣列；有平行邊時該權重的 CSR 重建，
+        因為每對節點保留的邊可能改變。衍生結構與收縮階層一併失效，版本號 +1。
+        """
+        if weight not in WEIGHTS:
+            raise ValueError(f"未知的權重：{weight}")
+        values = np.asarray(values, dtype=float)
+        if values.shape != (self.num_edges,):
+            raise ValueError(f"{weight} 需有 {self.num_edges} 個值，收到 {values.shape}")
+        with self._lock:
+            setattr(self, weight, values)
+            views = {}
+            for name, view in self._views.items():
+                if name != weight:
+                    # 該權重的 CSR 不變，快照只換總量用的每邊數值
+                    views[name] = view.with_values(self.length, self.exposure)
+                elif len(view.eid) == len(self.adjacency[2]):
+                    # 新矩陣共用 indptr / indices 與鍵值，查詢中的舊快照不受影響
+                    w = self.weight_array(weight)
+                    matrix = csr_matrix((w[view.eid], view.matrix.indices, view.matrix.indptr),
+                                        shape=view.matrix.shape)
+                    views[name] = self._new_view(w, matrix, view.eid, view._keys)
+            # 先清收縮階層再換快照：拿到新快照的搜尋不會再用到舊的收縮階層
+            self.ch = {k: ch for k, ch in self.ch.items() if k != weight}
+            self._views = views
+            self._bump()
+
+    def patch_edges(self, edges, weight, values):
+        # 只改部分邊的權重
+        with self._lock:
+            arr = np.array(getattr(self, weight), dtype=float)
+            arr[edges] = values
+            self.set_weight(weight, arr)
+
+    # ========== 增量更新 ==========
+    def close_edges(self, edges, closed=True):
+        """封閉（closed=False 時重新開放）指定的邊；邊 id 不變，只是搜尋時略過。"""
+        with self._lock:
+            # 複製後換掉，不原地修改進行中搜尋正在讀的陣列
+            mask = self.closed.copy()
+            mask[edges] = closed
+            self.closed = mask
+            self._reset()
+
+    def add_nodes(self, xy):
+        """新增節點，回傳新節點 id；空間索引只加入新點，不整棵重建。"""
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        with self._lock:
+            ids = np.arange(self.num_nodes, self.num_nodes + len(xy))
+            self.xy = np.concatenate([self.xy, xy])
+            self.latlon = np.concatenate([self.latlon, twd97_to_latlon(xy)])
+            self.index.add(xy)
+            self._nodes = None
+            # 新節點沒有鄰邊，indptr 補上相同的結尾即可
+            indptr, indices, eid = self.adjacency
+            indptr = np.concatenate([indptr, np.full(len(xy), indptr[-1], dtype=indptr.dtype)])
+            self.adjacency = (indptr, indices, eid)
+            self._reset()
+        return ids
+
+    def add_edges(self, u, v, length, exposure, geometries=None):
+        """新增邊，回傳新邊 id；geometries 為各邊的 (lon, lat) 座標陣列或 None。"""
+        u = np.asarray(u, dtype=np.int32)
+        v = np.asarray(v, dtype=np.int32)
+        coords = [np.asarray(g, dtype=float).reshape(-1, 2) if g is not None else np.empty((0, 2))
+                  for g in (geometries or [None] * len(u))]
+        counts = np.array([len(c) for c in coords], dtype=np.int64)
+        with self._lock:
+            ids = np.arange(self.num_edges, self.num_edges + len(u))
+            self.u = np.concatenate([self.u, u])
+            self.v = np.concatenate([self.v, v])
+            self.length = np.concatenate([self.length, np.asarray(length, dtype=float)])
+            self.exposure = np.concatenate([self.exposure, np.asarray(exposure, dtype=float)])
+            self.geom_offsets = np.concatenate([self.geom_offsets,
+                                                self.geom_offsets[-1] + np.cumsum(counts)])
+            self.geom_coords = np.concatenate([self.geom_coords, *coords])
+            self.closed = np.concatenate([self.closed, np.zeros(len(u), dtype=bool)])
+            self.adjacency = self._build_adjacency()
+            self._reset()
+        return ids
+
+    def _reset(self):
+        # 路網結構改變：所有快照與收縮階層都失效；換成新的空 dict 而不原地清空，
+        # 其他執行緒進行中的搜尋仍讀得到舊的那份。先清收縮階層再換快照，理由同 set_weight
+        self.ch = {}
+        self._views = {}
+        self._bump()
+
+    def _bump(self):
+        # 版本號進入路徑快取的鍵；舊結果不會再被取用，直接清掉釋放記憶體
+        self.version += 1
+        self.route_cache.clear()
+
+    # ========== 純 Python 搜尋用的結構 ==========
+    def adjacency_lists(self, weight, reverse=False):
+        return self.view(weight).adjacency_lists(reverse)
+
+    def heuristic_scale(self, weight):
+        return self.view(weight).heuristic_scale()
+
+    # ========== 最短路徑 ==========
+    def shortest_path(self, source, target, weight, mode="auto"):
+        """以整數 id 求最短路徑，回傳節點 id 陣列；不連通時回傳 None。"""
+        return search(self, source, target, weight, mode)[0]
@@ -0,0 +1,144 @@
+import math
+from heapq import heappop, heappush
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from routing.network import csr_keys, lookup_edges
+
+PARETO_ROUTES = 5  # 顯示的權衡路徑數（含最短與最低暴露兩端）
+PARETO_MAX_LABELS = 200000  # BOA* 最多展開的標籤數，超過改用加權和近似
+
+
+# ========== 下界 ==========
+def lower_bounds(G, target):
+    # 各節點到終點的 length / exposure 最小值（反向單源搜尋），作為兩個目標的一致下界
+    bounds = []
+    for weight in ("length", "exposure"):
+        matrix, _ = G.csr(weight)
+        if G.directed:
+            matrix = matrix.T.tocsr()
+        bounds.append(dijkstra(matrix, directed=True, indices=target))
+    return bounds
+
+
+# ========== 精確 Pareto 前緣（BOA*）==========
+def pareto_frontier(G, source, target, max_labels=PARETO_MAX_LABELS):
+    """雙目標 A*（BOA*）求 (length, exposure) 的完整 Pareto 前緣。
+
+    標籤依 (f_length, f_exposure) 字典序展開；每個節點只記錄已展開標籤的最小 exposure
+    （g2_min），新標籤的 exposure 不比它小就被支配，不必逐一比較標籤串列。
+    回傳依 length 遞增的 (節點 id 路徑, 邊 id 串列)；每個標籤記下走的邊，平行邊不會混淆。
+    展開超過 max_labels 時回傳 None。
+    """
+    h1, h2 = lower_bounds(G, target)
+    if not np.isfinite(h1[source]):
+        return []
+    indptr, indices, eid = (a.tolist() for a in G.adjacency)
+    w1 = G.weight_array("length").tolist()
+    w2 = G.weight_array("exposure").tolist()
+    h1, h2 = h1.tolist(), h2.tolist()
+
+    node, parent, via = [source], [-1], [-1]
+    heap = [(h1[source], h2[source], 0.0, 0.0, 0)]
+    g2_min = {}
+    goal_g2 = math.inf
+    solutions = []
+    expanded = 0
+    while heap:
+        _, f2, g1, g2, label = heappop(heap)
+        u = node[label]
+        if g2 >= g2_min.get(u, math.inf) or f2 >= goal_g2:
+            continue
+        g2_min[u] = g2
+        if u == target:
+            solutions.append(label)
+            goal_g2 = g2
+            continue
+        expanded += 1
+        if expanded > max_labels:
+            return None
+        for k in range(indptr[u], indptr[u + 1]):
+            v, e = indices[k], eid[k]
+            n2 = g2 + w2[e]
+            if n2 >= g2_min.get(v, math.inf) or n2 + h2[v] >= goal_g2:
+                continue
+            n1 = g1 + w1[e]
+            node.append(v)
+            parent.append(label)
+            via.append(e)
+            heappush(heap, (n1 + h1[v], n2 + h2[v], n1, n2, len(node) - 1))
+
+    paths = []
+    for label in solutions:
+        path, edges = [], []
+        while label >= 0:
+            path.append(node[label])
+            edges.append(via[label])
+            label = parent[label]
+        paths.append((path[::-1], edges[-2::-1]))
+    return paths
+
+
+# ========== 加權和近似 ==========
+def _weighted_path(G, source, target, a, b):
+    # 回傳 (節點 id 路徑, 邊 id tuple)；邊取自這次加權 CSR，平行邊為加權和最小者
+    matrix, eid = G.build_csr(a * G.weight_array("length") + b * G.weight_array("exposure"))
+    _, pred = dijkstra(matrix, directed=True, indices=source, return_predecessors=True)
+    if source != target and pred[target] < 0:
+        return None
+    path = [target]
+    while path[-1] != source:
+        path.append(int(pred[path[-1]]))
+    path = path[::-1]
+    edges = lookup_edges(csr_keys(matrix), eid, G.num_nodes, path[:-1], path[1:])
+    return path, tuple(edges.tolist())
+
+
+def weighted_sum_frontier(G, source, target, k=PARETO_ROUTES):
+    """以二分法（dichotomic search）找前緣的凸包支撐點，最多 k 條，依 length 遞增。
+
+    每次以相鄰兩點連線的法向量作為 length / exposure 的權重跑一次 Dijkstra。
+    回傳格式同 pareto_frontier。
+    """
+    ends = [_weighted_path(G, source, target, 1.0, 0.0),
+            _weighted_path(G, source, target, 0.0, 1.0)]
+    if ends[0] is None:
+        return []
+    # 以邊 id tuple 當鍵：同一串節點走不同平行邊也算不同路徑
+    nodes = {edges: path for path, edges in ends}
+    points = {edges: G.edge_totals(list(edges)) for _, edges in ends}
+    pending = [edges for _, edges in ends]
+    pairs = [(pending[0], pending[1])] if pending[0] != pending[1] else []
+    while pairs and len(points) < k:
+        left, right = pairs.pop(0)
+        (l1, x1), (l2, x2) = points[left], points[right]
+        a, b = x1 - x2, l2 - l1
+        if a <= 0 or b <= 0:
+            continue
+        path, mid = _weighted_path(G, source, target, a, b)
+        lm, xm = G.edge_totals(list(mid))
+        if mid in points or a * lm + b * xm >= a * l1 + b * x1 - 1e-9 * (a * l1 + b * x1):
+            continue
+        nodes[mid] = path
+        points[mid] = (lm, xm)
+        pairs += [(left, mid), (mid, right)]
+    return [(nodes[e], list(e)) for e in sorted(points, key=lambda e: points[e])]
+
+
+# ========== 權衡路徑 ==========
+def pareto_routes(G, source, target, k=PARETO_ROUTES, max_labels=PARETO_MAX_LABELS):
+    """回傳最多 k 條 (path, length, exposure)，依 length 遞增，第一條最短、最後一條暴露最低。
+
+    先跑精確 BOA*，標籤過多時改用加權和近似；前緣超過 k 條時依 exposure 平均取樣。
+    """
+    paths = pareto_frontier(G, source, target, max_labels)
+    if paths is None:
+        paths = weighted_sum_frontier(G, source, target, k)
+    routes = [(p, *G.edge_totals(edges)) for p, edges in paths]
+    if len(routes) <= k:
+        return routes
+    wanted = np.linspace(routes[0][2], routes[-1][2], k)
+    exposures = np.array([r[2] for r in routes])
+    picked = sorted({int(np.abs(exposures - x).argmin()) for x in wanted})
+    return [routes[i] for i in picked]
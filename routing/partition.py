@@ -0,0 +1,456 @@
+# 依 TWD97 方格把路網切成多個分區，只載入查詢碰到的分區：
+# python -m routing.partition [pkl] [輸出資料夾] [--artifact 資料夾] [--cell 公尺]
+# 分區之間以「邊界節點覆蓋圖」相連：跨區的邊，加上每個分區內各邊界節點兩兩之間的最短距離，
+# 起訖點所在分區的區內搜尋接上覆蓋圖即可求得與整張圖相同的最短路徑。
+# 設定環境變數 ROUTING_PARTITIONS=分區資料夾 後，load_graph 改回傳 PartitionedNetwork，
+# find_nearest_node、compute_path、route_geometry 用法不變
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from routing.artifact import load_artifact, save_artifact
+from routing.cache import RouteCache
+from routing.graph import ARTIFACT_PATH, PKL_PATH, load_graph
+from routing.matrix import tree_sums
+from routing.network import WEIGHTS, RoadNetwork, csr_keys, lookup_edges
+from routing.projection import latlon_to_twd97
+from routing.search import _chain
+from routing.spatial import MAX_SNAP_DIST
+
+PARTITION_PATH = r"data/Tai_Road_濃度_最大連通版_分區"  # python -m routing.partition 產生
+PARTITION_FORMAT = 2
+CELL_SIZE = 5000  # 分區方格邊長（公尺）
+CLIQUE_BATCH = 64  # 建覆蓋圖時每次同時搜尋的邊界節點數，控制記憶體
+OVERLAY_PARTS = ("indptr", "indices", "data", "length", "exposure")
+
+
+def cell_path(path, cell):
+    # cell 為 -1 時是跨區邊（兩端皆為邊界節點）組成的路網
+    if cell < 0:
+        return os.path.join(path, "cut")
+    return os.path.join(path, "cells", str(cell))
+
+
+# ========== 建置 ==========
+def subnetwork(net, nodes, edges):
+    """取出 nodes（遞增的全域 id）與兩端都在其中的 edges，重新編號成獨立的 RoadNetwork。"""
+    starts = net.geom_offsets[edges]
+    counts = net.geom_offsets[edges + 1] - starts
+    offsets = np.zeros(len(edges) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    picked = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+    sub = RoadNetwork(
+        net.xy[nodes], np.searchsorted(nodes, net.u[edges]), np.searchsorted(nodes, net.v[edges]),
+        net.length[edges], net.exposure[edges], offsets, net.geom_coords[picked],
+        latlon=net.latlon[nodes], directed=net.directed,
+    )
+    sub.closed = net.closed[edges].copy()
+    return sub
+
+
+def clique(sub, local_boundary, weight):
+    """分區內各邊界節點兩兩之間的最短距離：(起點, 終點, 成本, length, exposure)，皆為區內編號。"""
+    matrix, _ = sub.csr(weight)
+    parts = []
+    for i in range(0, len(local_boundary), CLIQUE_BATCH):
+        sources = local_boundary[i:i + CLIQUE_BATCH]
+        dist, pred = dijkstra(matrix, directed=True, indices=sources, return_predecessors=True)
+        length = np.array([tree_sums(sub, weight, p, sub.length) for p in pred])
+        exposure = np.array([tree_sums(sub, weight, p, sub.exposure) for p in pred])
+        rows, cols = np.nonzero(np.isfinite(dist[:, local_boundary]))
+        targets = local_boundary[cols]
+        keep = sources[rows] != targets
+        rows, targets = rows[keep], targets[keep]
+        parts.append((sources[rows], targets, dist[rows, targets], length[rows, targets],
+                      exposure[rows, targets]))
+    if not parts:
+        return (np.empty(0, dtype=np.int64),) * 2 + (np.empty(0),) * 3
+    return tuple(np.concatenate(p) for p in zip(*parts))
+
+
+def overlay_csr(src, dst, cost, length, exposure, size):
+    # 平行的覆蓋邊只留成本最小者；最後一列保留給查詢時的超級起點
+    order = np.lexsort((cost, dst, src))
+    src, dst, cost, length, exposure = (a[order] for a in (src, dst, cost, length, exposure))
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    src = src[keep]
+    indptr = np.searchsorted(src, np.arange(size + 2)).astype(np.int64)
+    return indptr, dst[keep].astype(np.int32), cost[keep], length[keep], exposure[keep]
+
+
+def build_partitions(net, path, cell_size=CELL_SIZE):
+    """依 cell_size 公尺方格切分區並寫出各分區與覆蓋圖，回傳分區數。"""
+    cells = np.floor(np.asarray(net.xy) / cell_size).astype(np.int64)
+    keys, node_cell = np.unique(cells, axis=0, return_inverse=True)
+    node_cell = node_cell.ravel().astype(np.int32)
+    cu, cv = node_cell[net.u], node_cell[net.v]
+    cut = np.flatnonzero(cu != cv)
+    is_boundary = np.zeros(net.num_nodes, dtype=bool)
+    is_boundary[net.u[cut]] = True
+    is_boundary[net.v[cut]] = True
+    boundary = np.flatnonzero(is_boundary)
+
+    entries = {w: [] for w in WEIGHTS}
+    # 跨區的邊直接放進覆蓋圖
+    for weight in WEIGHTS:
+        w = net.weight_array(weight)[cut]
+        ok = np.isfinite(w)
+        e = cut[ok]
+        a, b = np.searchsorted(boundary, net.u[e]), np.searchsorted(boundary, net.v[e])
+        sides = [(a, b)] if net.directed else [(a, b), (b, a)]
+        for s, t in sides:
+            entries[weight].append((s, t, w[ok], net.length[e], net.exposure[e]))
+
+    # 各分區：存成獨立的路網檔，邊界節點兩兩之間的最短距離放進覆蓋圖
+    edge_cell = np.where(cu == cv, cu, -1)
+    node_order = np.argsort(node_cell, kind="stable")
+    node_start = np.searchsorted(node_cell[node_order], np.arange(len(keys) + 1))
+    edge_order = np.argsort(edge_cell, kind="stable")
+    edge_start = np.searchsorted(edge_cell[edge_order], np.arange(len(keys) + 1))
+    for c in range(len(keys)):
+        nodes = node_order[node_start[c]:node_start[c + 1]]
+        edges = edge_order[edge_start[c]:edge_start[c + 1]]
+        sub = subnetwork(net, nodes, edges)
+        out = cell_path(path, c)
+        save_artifact(sub, out)
+        np.save(os.path.join(out, "nodes.npy"), nodes.astype(np.int64))
+        np.save(os.path.join(out, "edges.npy"), edges.astype(np.int64))
+        local_boundary = np.flatnonzero(is_boundary[nodes])
+        for weight in WEIGHTS:
+            s, t, cost, length, exposure = clique(sub, local_boundary, weight)
+            entries[weight].append((np.searchsorted(boundary, nodes[s]),
+                                    np.searchsorted(boundary, nodes[t]), cost, length, exposure))
+
+    # 跨區的邊另存一份路網（節點為邊界節點），展開路徑與組幾何時用
+    out = cell_path(path, -1)
+    save_artifact(subnetwork(net, boundary, cut), out)
+    np.save(os.path.join(out, "nodes.npy"), boundary.astype(np.int64))
+    np.save(os.path.join(out, "edges.npy"), cut.astype(np.int64))
+
+    for weight in WEIGHTS:
+        arrays = [np.concatenate(a) for a in zip(*entries[weight])]
+        for part, arr in zip(OVERLAY_PARTS, overlay_csr(*arrays, len(boundary))):
+            np.save(os.path.join(path, f"overlay_{weight}_{part}.npy"), arr)
+    np.save(os.path.join(path, "boundary.npy"), boundary.astype(np.int64))
+    np.save(os.path.join(path, "node_cell.npy"), node_cell)
+    np.save(os.path.join(path, "edge_cell.npy"), edge_cell.astype(np.int32))
+    np.save(os.path.join(path, "cell_keys.npy"), keys)
+    meta = {
+        "format": PARTITION_FORMAT,
+        "cell_size": cell_size,
+        "directed": bool(net.directed),
+        "num_nodes": net.num_nodes,
+        "num_edges": net.num_edges,
+        "num_cells": len(keys),
+        "num_boundary": len(boundary),
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return len(keys)
+
+
+# ========== 分區路網 ==========
+class PartitionedNetwork:
+    """分區載入的路網：節點與邊 id 與整張圖相同，分區在查詢碰到時才 mmap 載入。
+
+    與 RoadNetwork 共用 routing.graph 的 find_nearest_node、compute_path 與 route_geometry；
+    權衡路徑、替代路徑、可達範圍與增量更新需要整張圖，不支援。
+    route_totals 只需起訖點所在的分區；展開完整路徑時會另外載入途經的分區。
+    """
+
+    partitioned = True
+
+    def __init__(self, path=PARTITION_PATH, mmap=True):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != PARTITION_FORMAT:
+            raise ValueError(f"不支援的分區檔格式：{meta.get('format')}（請重新執行 python -m routing.partition）")
+        self.path = path
+        self.meta = meta
+        self.mmap = mmap
+        self.cell_size = meta["cell_size"]
+        self.directed = meta["directed"]
+        mode = "r" if mmap else None
+        self.node_cell = np.load(os.path.join(path, "node_cell.npy"), mmap_mode=mode)
+        self.edge_cell = np.load(os.path.join(path, "edge_cell.npy"), mmap_mode=mode)
+        self.boundary = np.load(os.path.join(path, "boundary.npy"), mmap_mode=mode)
+        keys = np.load(os.path.join(path, "cell_keys.npy"))
+        self.cell_index = {tuple(k): c for c, k in enumerate(keys.tolist())}
+        self.cell_bounds = (keys.min(axis=0), keys.max(axis=0))
+        self.index = CellIndex(self)
+        self.latlon = _NodeAttr(self, "latlon")
+        self.xy = _NodeAttr(self, "xy")
+        self.route_cache = RouteCache()
+        self.version = 0
+        self.load_seconds = None
+        self.loaded_from = None
+        self._overlay = {}
+        self._cells = {}
+
+    @property
+    def num_nodes(self):
+        return self.meta["num_nodes"]
+
+    @property
+    def num_edges(self):
+        return self.meta["num_edges"]
+
+    @property
+    def loaded_cells(self):
+        return sorted(c for c in self._cells if c >= 0)
+
+    def cell(self, c):
+        """第 c 個分區（-1 為跨區邊）：(RoadNetwork, 區內 → 全域節點 id, 區內 → 全域邊 id)。"""
+        cell = self._cells.get(c)
+        if cell is None:
+            out = cell_path(self.path, c)
+            mode = "r" if self.mmap else None
+            cell = self._cells[c] = (load_artifact(out, self.mmap),
+                                     np.load(os.path.join(out, "nodes.npy"), mmap_mode=mode),
+                                     np.load(os.path.join(out, "edges.npy"), mmap_mode=mode))
+        return cell
+
+    def overlay(self, weight):
+        # (csr_matrix 不含超級起點那一列的資料, length, exposure, CSR 鍵值)
+        overlay = self._overlay.get(weight)
+        if overlay is None:
+            mode = "r" if self.mmap else None
+            indptr, indices, data, length, exposure = (
+                np.load(os.path.join(self.path, f"overlay_{weight}_{part}.npy"), mmap_mode=mode)
+                for part in OVERLAY_PARTS)
+            size = len(self.boundary) + 1
+            matrix = csr_matrix((data, indices, indptr), shape=(size, size))
+            overlay = self._overlay[weight] = (matrix, length, exposure, csr_keys(matrix))
+        return overlay
+
+    def _local(self, node):
+        c = int(self.node_cell[node])
+        sub, nodes, _ = self.cell(c)
+        return c, sub, int(np.searchsorted(nodes, node))
+
+    def _gather(self, ids, owner, attr, by_edge):
+        # 依所屬分區分組，從各分區讀出 attr；by_edge 為 True 時 ids 是邊 id，否則是節點 id
+        ids = np.asarray(ids, dtype=np.int64)
+        cells = np.asarray(owner[ids])
+        out = None
+        for c in np.unique(cells).tolist():
+            pick = cells == c
+            sub, nodes, sub_edges = self.cell(c)
+            values = getattr(sub, attr)[np.searchsorted(sub_edges if by_edge else nodes, ids[pick])]
+            if out is None:
+                out = np.empty((len(ids),) + values.shape[1:], dtype=values.dtype)
+            out[pick] = values
+        return out if out is not None else np.empty(0)
+
+    # ========== 路徑邊與總量 ==========
+    def path_edges(self, path, weight):
+        """與 RoadNetwork.path_edges 相同：路徑每一步實際使用的全域邊 id。"""
+        edges = []
+        for a, b in zip(path[:-1], path[1:]):
+            c = int(self.node_cell[a]) if self.node_cell[a] == self.node_cell[b] else -1
+            sub, nodes, sub_edges = self.cell(c)
+            la, lb = np.searchsorted(nodes, [a, b])
+            edges.append(int(sub_edges[sub.csr_edges(weight, [la], [lb])[0]]))
+        return np.array(edges, dtype=np.int64)
+
+    def edge_totals(self, edges):
+        # 一組全域邊 id 的總長與總暴露量
+        if len(edges) == 0:
+            return 0.0, 0.0
+        return tuple(float(self._gather(edges, self.edge_cell, attr, by_edge=True).sum())
+                     for attr in ("length", "exposure"))
+
+    def path_network(self, path, edges):
+        """路徑經過的節點與邊組成的小 RoadNetwork，回傳 (路網, 路徑, 邊)，給 routing.geometry 組幾何用。"""
+        path = np.asarray(path, dtype=np.int64)
+        edges = np.asarray(edges, dtype=np.int64)
+        coords = []
+        for c, e in zip(np.asarray(self.edge_cell[edges]).tolist(), edges.tolist()):
+            sub, _, sub_edges = self.cell(c)
+            k = int(np.searchsorted(sub_edges, e))
+            coords.append(sub.geom_coords[sub.geom_offsets[k]:sub.geom_offsets[k + 1]])
+        offsets = np.zeros(len(edges) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in coords])
+        length, exposure = (self._gather(edges, self.edge_cell, attr, by_edge=True)
+                            for attr in ("length", "exposure"))
+        mini = RoadNetwork(self.xy[path], np.arange(len(edges)), np.arange(1, len(path)),
+                           length, exposure, offsets,
+                           np.concatenate(coords) if coords else np.empty((0, 2)),
+                           latlon=self.latlon[path], directed=self.directed)
+        return mini, np.arange(len(path)), np.arange(len(edges))
+
+    # ========== 路徑 ==========
+    def route_totals(self, source, target, weight):
+        """回傳 (總長, 總暴露量)，到不了時為 None；只載入起訖點所在的分區。"""
+        key = (source, target, weight, self.version, "totals")
+        return self.route_cache.get_or_compute(
+            key, lambda: self._route(source, target, weight, unpack=False)[1])
+
+    def search_edges(self, source, target, weight):
+        """與 routing.search_edges 相同：(全域節點 id 陣列或 None, 全域邊 id 陣列或 None, 已定案節點數)。
+
+        以區內搜尋接覆蓋圖求得與整張圖相同的最短路徑，不分搜尋模式。
+        """
+        if source == target:
+            return np.array([source]), np.empty(0, dtype=np.int64), 1
+        path, edges, settled = self._route(source, target, weight, unpack=True)
+        if path is None:
+            return None, None, settled
+        return np.array(path), np.array(edges, dtype=np.int64), settled
+
+    def _route(self, source, target, weight, unpack):
+        # unpack 為 False 時回傳 (None, 總量)，否則 (全域節點串列, 全域邊串列, 已定案節點數)
+        cs, sub_s, ls = self._local(source)
+        ct, sub_t, lt = self._local(target)
+        matrix_s, _ = sub_s.csr(weight)
+        dist_s, pred_s = dijkstra(matrix_s, directed=True, indices=ls, return_predecessors=True)
+        matrix_t, _ = sub_t.csr(weight)
+        if self.directed:
+            matrix_t = matrix_t.T.tocsr()
+        dist_t, pred_t = dijkstra(matrix_t, directed=True, indices=lt, return_predecessors=True)
+        settled = int(np.isfinite(dist_s).sum() + np.isfinite(dist_t).sum())
+
+        # 超級起點接到起點分區的各邊界節點，成本為區內距離，再於覆蓋圖上搜尋一次
+        overlay, ov_length, ov_exposure, ov_keys = self.overlay(weight)
+        _, nodes_s, edges_s = self.cell(cs)
+        _, nodes_t, edges_t = self.cell(ct)
+        exits = np.flatnonzero(np.isin(nodes_s, self.boundary) & np.isfinite(dist_s))
+        entries = np.flatnonzero(np.isin(nodes_t, self.boundary) & np.isfinite(dist_t))
+        size = overlay.shape[0]
+        best, via = np.inf, None
+        if cs == ct and np.isfinite(dist_s[lt]):
+            best = dist_s[lt]
+        if len(exits) and len(entries):
+            super_source = size - 1
+            indptr = overlay.indptr.copy()
+            indptr[-1] += len(exits)
+            matrix = csr_matrix(
+                (np.concatenate([overlay.data, dist_s[exits]]),
+                 np.concatenate([overlay.indices, np.searchsorted(self.boundary, nodes_s[exits])]),
+                 indptr), shape=overlay.shape)
+            dist_ov, pred_ov = dijkstra(matrix, directed=True, indices=super_source,
+                                        return_predecessors=True)
+            settled += int(np.isfinite(dist_ov).sum())
+            ov_entries = np.searchsorted(self.boundary, nodes_t[entries])
+            total = dist_ov[ov_entries] + dist_t[entries]
+            if len(total) and total.min() < best:
+                i = int(total.argmin())
+                best, via = total[i], (ov_entries[i], entries[i])
+        if not np.isfinite(best):
+            return (None, None) if not unpack else (None, None, settled)
+
+        if via is None:
+            # 起訖點同區且不出區最短
+            local = _chain(pred_s, lt)[::-1]
+            local_edges = sub_s.path_edges(local, weight)
+            if not unpack:
+                return None, sub_s.edge_totals(local_edges)
+            return nodes_s[local].tolist(), edges_s[local_edges].tolist(), settled
+
+        ov_target, entry = via
+        ov_path = _chain(pred_ov, ov_target)[::-1][1:]  # 去掉超級起點
+        exit_node = int(self.boundary[ov_path[0]])
+        head = _chain(pred_s, int(np.searchsorted(nodes_s, exit_node)))[::-1]
+        tail = _chain(pred_t, entry)
+        head_edges = sub_s.path_edges(head, weight)
+        tail_edges = sub_t.path_edges(tail, weight)
+        if not unpack:
+            ov_edges = lookup_edges(ov_keys, np.arange(overlay.nnz), size, ov_path[:-1], ov_path[1:])
+            parts = [sub_s.edge_totals(head_edges),
+                     (float(ov_length[ov_edges].sum()), float(ov_exposure[ov_edges].sum())),
+                     sub_t.edge_totals(tail_edges)]
+            return None, (sum(p[0] for p in parts), sum(p[1] for p in parts))
+        path, edges = nodes_s[head].tolist(), edges_s[head_edges].tolist()
+        for a, b in zip(ov_path[:-1], ov_path[1:]):
+            step_nodes, step_edges = self._unpack(int(self.boundary[a]), int(self.boundary[b]), weight)
+            path += step_nodes[1:]
+            edges += step_edges
+        path += nodes_t[tail].tolist()[1:]
+        edges += edges_t[tail_edges].tolist()
+        return path, edges, settled
+
+    def _unpack(self, a, b, weight):
+        """覆蓋圖上的一步展開成 (全域節點串列, 全域邊串列)：跨區的邊直接相連，同區在該分區內搜尋。"""
+        if self.node_cell[a] != self.node_cell[b]:
+            sub, nodes, sub_edges = self.cell(-1)
+            la, lb = np.searchsorted(nodes, [a, b])
+            return [a, b], [int(sub_edges[sub.csr_edges(weight, [la], [lb])[0]])]
+        c, sub, la = self._local(a)
+        _, nodes, sub_edges = self.cell(c)
+        _, pred = dijkstra(sub.csr(weight)[0], directed=True, indices=la, return_predecessors=True)
+        local = _chain(pred, int(np.searchsorted(nodes, b)))[::-1]
+        return nodes[local].tolist(), sub_edges[sub.path_edges(local, weight)].tolist()
+
+
+class _NodeAttr:
+    """以全域節點 id 索引的唯讀節點屬性（latlon、xy），從各分區讀出。"""
+
+    def __init__(self, net, attr):
+        self.net = net
+        self.attr = attr
+
+    def __getitem__(self, nodes):
+        ids = np.asarray(nodes, dtype=np.int64)
+        values = self.net._gather(ids.ravel(), self.net.node_cell, self.attr, by_edge=False)
+        return values.reshape(ids.shape + (2,))
+
+
+class CellIndex:
+    """分區路網的最近節點查詢：由查詢點所在方格向外一圈圈找，只載入可能更近的分區。"""
+
+    def __init__(self, net):
+        self.net = net
+
+    def nearest(self, lat, lon, max_dist=MAX_SNAP_DIST):
+        # 回傳全域節點 id；max_dist 內沒有節點時回傳 None
+        net, size = self.net, self.net.cell_size
+        x, y = latlon_to_twd97(lat, lon)[0]
+        cx, cy = int(np.floor(x / size)), int(np.floor(y / size))
+        low, high = net.cell_bounds
+        rings = max(cx - low[0], high[0] - cx, cy - low[1], high[1] - cy, 0)
+        best, best_dist = None, np.inf
+        for r in range(int(rings) + 1):
+            # 第 r 圈的方格離查詢點至少 (r - 1) × 邊長，比目前最佳或 max_dist 遠就停
+            if (r - 1) * size > min(best_dist, max_dist):
+                break
+            for i in range(cx - r, cx + r + 1):
+                for j in range(cy - r, cy + r + 1):
+                    if max(abs(i - cx), abs(j - cy)) != r:
+                        continue
+                    c = net.cell_index.get((i, j))
+                    if c is None:
+                        continue
+                    # 方格與查詢點的最短距離超過目前最佳時不必載入
+                    dx = max(i * size - x, 0, x - (i + 1) * size)
+                    dy = max(j * size - y, 0, y - (j + 1) * size)
+                    if np.hypot(dx, dy) > min(best_dist, max_dist):
+                        continue
+                    sub, nodes, _ = net.cell(c)
+                    idx, dist = sub.index.query(np.array([[x, y]]), max_dist)
+                    if idx[0] >= 0 and dist[0] < best_dist:
+                        best, best_dist = int(nodes[idx[0]]), dist[0]
+        return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把路網依方格切成分區並建立邊界覆蓋圖")
+    parser.add_argument("pkl", nargs="?", default=PKL_PATH)
+    parser.add_argument("out", nargs="?", default=PARTITION_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    parser.add_argument("--cell", type=float, default=CELL_SIZE, help="方格邊長（公尺）")
+    args = parser.parse_args(argv)
+
+    net = load_graph(args.pkl, args.artifact, partition_path=None)
+    t0 = time.perf_counter()
+    cells = build_partitions(net, args.out, args.cell)
+    print(f"✅ {args.out}：{cells} 個分區，{time.perf_counter() - t0:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# 全路網預先統計（多行程、可中斷續跑）：
+# python -m routing.precompute 輸出資料夾 [--sources N] [--targets N] [--zone-size 公尺] [--workers N]
+# 抽樣（或全部）起點各跑一次 length 與 exposure 單源搜尋，每個起點到抽樣終點的兩條路徑一起統計：
+# 各邊被最短／最低暴露路徑使用的次數、各分區（TWD97 方格）之間的平均改善率，寫成 .npy
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from routing.graph import ARTIFACT_PATH, PKL_PATH, load_graph
+from routing.matrix import tree_sums
+from routing.stats import improvement_rate, route_stats
+
+ZONE_SIZE = 2000  # 統計分區方格邊長（公尺）
+TARGETS = 200  # 每個起點抽樣的終點數，0 表示所有節點
+CHUNK_SIZE = 16  # 每個工作一次處理的起點數
+CHECKPOINT_SECONDS = 30  # 至少隔多久寫一次進度
+STATE_FILE = "state.npz"
+ROUTES = {"length": "shortest", "exposure": "lowexp"}  # 搜尋權重 → 輸出檔名前綴
+
+# 工作行程共用的唯讀資料：fork 時直接繼承父行程，否則由 initializer 載入
+_G = None
+_ZONE = None
+
+
+def _init_worker(pkl_path, artifact_path, zone):
+    global _G, _ZONE
+    if _G is None:
+        _G = load_graph(pkl_path, artifact_path)
+    _ZONE = zone
+
+
+# ========== 分區 ==========
+def node_zones(G, zone_size=ZONE_SIZE):
+    """每個節點所屬的方格編號與各方格的 (欄, 列) 索引。"""
+    cells = np.floor(np.asarray(G.xy) / zone_size).astype(np.int64)
+    keys, zone = np.unique(cells, axis=0, return_inverse=True)
+    return zone.ravel().astype(np.int32), keys
+
+
+# ========== 單一起點 ==========
+def sample_targets(num_nodes, source, targets, seed):
+    # 以 (seed, 起點) 決定抽樣，續跑或換行程數時結果相同
+    if not targets or targets >= num_nodes - 1:
+        picked = np.arange(num_nodes)
+    else:
+        rng = np.random.default_rng([seed, source])
+        picked = rng.choice(num_nodes, targets + 1, replace=False)
+    return picked[picked != source][:targets or None]
+
+
+def subtree_counts(pred, depth, weight):
+    """每個節點子樹內的終點數（weight 加總），即樹上通往該節點的邊被多少條路徑經過。"""
+    count = np.asarray(weight, dtype=float).copy()
+    reached = np.flatnonzero(pred >= 0)
+    order = reached[np.argsort(-depth[reached], kind="stable")]
+    levels = np.flatnonzero(np.diff(depth[order])) + 1
+    # 由深到淺逐層把子樹的數量加到父節點，同一層一次處理
+    for nodes in np.split(order, levels):
+        np.add.at(count, pred[nodes], count[nodes])
+    return count
+
+
+def source_stats(G, zone, source, preds, targets, acc):
+    """把一個起點到各終點的兩條路徑累加進 acc（見 empty_stats）。"""
+    totals = {}
+    for weight, pred in preds.items():
+        # 樹深（邊數）決定由下往上累加的順序；起點與到不了的節點為 NaN
+        depth = tree_sums(G, weight, pred, np.ones(G.num_edges))
+        hit = np.zeros(G.num_nodes)
+        hit[targets[np.isfinite(depth[targets])]] = 1
+        count = subtree_counts(pred, np.nan_to_num(depth), hit)
+        node = np.flatnonzero(pred >= 0)
+        edges = G.csr_edges(weight, pred[node], node)
+        np.add.at(acc[f"{ROUTES[weight]}_usage"], edges, count[node].astype(np.int64))
+        totals[weight] = (tree_sums(G, weight, pred, G.length)[targets],
+                          tree_sums(G, weight, pred, G.exposure)[targets])
+    (l1, x1), (l2, x2) = totals["length"], totals["exposure"]
+    # 改善率與速度無關（時間相消），取任一速度計算
+    _, _, rate1 = route_stats(l1, x1, 1.0)
+    _, _, rate2 = route_stats(l2, x2, 1.0)
+    improve = improvement_rate(rate1, rate2)
+    valid = np.isfinite(improve) & np.isfinite(l1) & np.isfinite(l2)
+    dz = zone[targets[valid]]
+    np.add.at(acc["pair_count"], (zone[source], dz), 1)
+    np.add.at(acc["pair_improve_sum"], (zone[source], dz), improve[valid])
+    acc["pairs"] += int(valid.sum())
+
+
+def empty_stats(num_edges, num_zones):
+    return {
+        "shortest_usage": np.zeros(num_edges, dtype=np.int64),
+        "lowexp_usage": np.zeros(num_edges, dtype=np.int64),
+        "pair_count": np.zeros((num_zones, num_zones), dtype=np.int64),
+        "pair_improve_sum": np.zeros((num_zones, num_zones)),
+        "pairs": 0,
+    }
+
+
+def process_sources(G, zone, sources, targets, seed):
+    """一批起點：每種權重一次多源 scipy Dijkstra，回傳這批的統計。"""
+    acc = empty_stats(G.num_edges, int(zone.max()) + 1)
+    preds = {}
+    for weight in ROUTES:
+        matrix, _ = G.csr(weight)
+        _, preds[weight] = dijkstra(matrix, directed=True, indices=sources,
+                                    return_predecessors=True)
+    for row, source in enumerate(sources.tolist()):
+        picked = sample_targets(G.num_nodes, source, targets, seed)
+        source_stats(G, zone, source, {w: p[row] for w, p in preds.items()}, picked, acc)
+    return acc
+
+
+def _process_worker(index, sources, targets, seed):
+    return index, process_sources(_G, _ZONE, sources, targets, seed)
+
+
+# ========== 進度 ==========
+def load_state(out_dir, config):
+    """讀取上次的進度；設定不同（起點、抽樣、分區）時從頭開始。回傳 (統計, 已完成的批次)。"""
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None, set()
+    with np.load(path) as data:
+        if json.loads(str(data["config"])) != config:
+            print("⚠️ 設定與上次不同，重新計算", file=sys.stderr)
+            return None, set()
+        acc = {k: data[k] for k in ("shortest_usage", "lowexp_usage", "pair_count",
+                                    "pair_improve_sum")}
+        acc["pairs"] = int(data["pairs"])
+        return acc, set(data["done"].tolist())
+
+
+def save_state(out_dir, config, acc, done):
+    # 先寫暫存檔再改名，中途被中斷也不會留下壞掉的進度檔
+    tmp = os.path.join(out_dir, STATE_FILE + ".tmp.npz")
+    np.savez(tmp, config=json.dumps(config), done=np.array(sorted(done), dtype=np.int64), **acc)
+    os.replace(tmp, os.path.join(out_dir, STATE_FILE))
+
+
+def write_results(out_dir, acc, keys, zone, meta):
+    np.save(os.path.join(out_dir, "edge_usage_shortest.npy"), acc["shortest_usage"])
+    np.save(os.path.join(out_dir, "edge_usage_lowexp.npy"), acc["lowexp_usage"])
+    np.save(os.path.join(out_dir, "zone_pair_count.npy"), acc["pair_count"])
+    np.save(os.path.join(out_dir, "zone_pair_improve_sum.npy"), acc["pair_improve_sum"])
+    count = acc["pair_count"].sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, acc["pair_improve_sum"].sum(axis=1) / count, np.nan)
+    np.save(os.path.join(out_dir, "zone_improvement.npy"), mean)  # 起點分區的平均改善率（%）
+    np.save(os.path.join(out_dir, "zone_keys.npy"), keys)
+    np.save(os.path.join(out_dir, "node_zone.npy"), zone)
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+# ========== 批次 ==========
+def run_precompute(out_dir, sources=None, targets=TARGETS, zone_size=ZONE_SIZE, workers=None,
+                   chunk_size=CHUNK_SIZE, seed=0, pkl_path=PKL_PATH, artifact_path=ARTIFACT_PATH):
+    """sources 為抽樣起點數（None 為所有節點）；已完成的批次從 out_dir 的進度檔接續。
+
+    回傳 (本次計算的起訖點組數, 秒數)。
+    """
+    global _G, _ZONE
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    _G = G = load_graph(pkl_path, artifact_path)
+    _ZONE, keys = node_zones(G, zone_size)
+    if sources is None or sources >= G.num_nodes:
+        picked = np.arange(G.num_nodes)
+    else:
+        picked = np.sort(np.random.default_rng(seed).choice(G.num_nodes, sources, replace=False))
+    chunks = [picked[i:i + chunk_size] for i in range(0, len(picked), chunk_size)]
+    config = {"nodes": G.num_nodes, "edges": G.num_edges, "sources": len(picked),
+              "targets": targets, "zone_size": zone_size, "chunk_size": chunk_size, "seed": seed}
+    acc, done = load_state(out_dir, config)
+    if acc is None:
+        acc = empty_stats(G.num_edges, len(keys))
+    # 統計與已完成批次放在同一個 tuple，一次換掉：任何時候中斷，存下的兩者都對得上，
+    # 不會有「統計已加上、批次卻沒記完成」而續跑時重複計入的情形
+    state = (acc, frozenset(done))
+    pending = [i for i in range(len(chunks)) if i not in done]
+    if done:
+        print(f"接續上次進度：{len(done)}/{len(chunks)} 批已完成", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    executor = None
+    if workers > 1 and len(pending) > 1:
+        executor = ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                       initargs=(pkl_path, artifact_path, _ZONE))
+    start_pairs = acc["pairs"]
+    last_save = time.perf_counter()
+    try:
+        if executor is None:
+            results = (_process_worker(i, chunks[i], targets, seed) for i in pending)
+        else:
+            futures = [executor.submit(_process_worker, i, chunks[i], targets, seed)
+                       for i in pending]
+            results = (f.result() for f in as_completed(futures))
+        for index, part in results:
+            acc, done = state
+            state = ({key: acc[key] + part[key] for key in acc}, done | {index})
+            elapsed = time.perf_counter() - t0
+            print(f"\r{len(state[1])}/{len(chunks)} 批，"
+                  f"{(state[0]['pairs'] - start_pairs) / elapsed:.0f} 組/s", end="", file=sys.stderr)
+            if time.perf_counter() - last_save > CHECKPOINT_SECONDS:
+                save_state(out_dir, config, *state)
+                last_save = time.perf_counter()
+    finally:
+        # 中斷時也把已完成的批次存下來，下次執行接著算
+        save_state(out_dir, config, *state)
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    print(file=sys.stderr)
+    acc = state[0]
+    elapsed = time.perf_counter() - t0
+    write_results(out_dir, acc, keys, _ZONE, {**config, "pairs": acc["pairs"],
+                                                "zones": len(keys)})
+    return acc["pairs"] - start_pairs, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全路網抽樣起訖點，統計各邊使用次數與各分區改善率")
+    parser.add_argument("out_dir")
+    parser.add_argument("--sources", type=int, default=None, help="抽樣起點數（預設所有節點）")
+    parser.add_argument("--targets", type=int, default=TARGETS, help="每個起點抽樣的終點數，0 為全部")
+    parser.add_argument("--zone-size", type=float, default=ZONE_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pkl", default=PKL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        pairs, elapsed = run_precompute(args.out_dir, args.sources, args.targets, args.zone_size,
+                                        args.workers, args.chunk_size, args.seed, args.pkl,
+                                        args.artifact)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ 已中斷，進度存於 {args.out_dir}，以相同參數再執行即可接續", file=sys.stderr)
+        sys.exit(130)
+    print(f"✅ {pairs} 組起訖點、{pairs * 2} 條路徑，{elapsed:.1f} 秒"
+          f"（{pairs * 2 / max(elapsed, 1e-9):.1f} routes/s）")
+
+
+if __name__ == "__main__":
+    main()
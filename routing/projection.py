@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+import numpy as np
+from pyproj import Transformer
+
+TWD97 = "EPSG:3826"
+WGS84 = "EPSG:4326"
+
+
+# ========== 座標轉換器（共用、只建一次）==========
+@lru_cache(maxsize=None)
+def get_transformer(src, dst):
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+# ========== 整批座標轉換 ==========
+def transform_coords(coords, src, dst):
+    # coords 為 (N, 2) 的 (x, y) / (lon, lat) 陣列，一次轉完整個陣列
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    x, y = get_transformer(src, dst).transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def twd97_to_latlon(xy):
+    # 回傳 (N, 2) 的 (lat, lon)，與 folium 的座標順序一致
+    return transform_coords(xy, TWD97, WGS84)[:, ::-1].copy()
+
+
+def latlon_to_twd97(lats, lons):
+    lats = np.atleast_1d(np.asarray(lats, dtype=float))
+    lons = np.atleast_1d(np.asarray(lons, dtype=float))
+    x, y = get_transformer(WGS84, TWD97).transform(lons, lats)
+    return np.column_stack([x, y])
+
+
+def lonlat_to_latlon(coords):
+    # 幾何座標緩衝區 (lon, lat) → folium 的 (lat, lon)
+    return np.asarray(coords)[:, ::-1]
+
+
+# ========== 疊圖範圍 ==========
+@lru_cache(maxsize=None)
+def bounds_to_latlon(left, bottom, right, top):
+    # TWD97 範圍 → folium 的 [[南, 西], [北, 東]]，同一範圍只算一次
+    (west, south), (east, north) = transform_coords(
+        [(left, bottom), (right, top)], TWD97, WGS84
+    ).tolist()
+    return [[south, west], [north, east]]
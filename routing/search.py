@@ -0,0 +1,148 @@
+import math
+from heapq import heappop, heappush
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+SEARCH_MODES = ("dijkstra", "bidirectional", "astar", "bidirectional_astar", "ch")
+
+
+# ========== 點對點搜尋 ==========
+def search(G, source, target, weight, mode="dijkstra", view=None):
+    """回傳 (節點 id 陣列或 None, 已定案節點數)。各模式的路徑成本相同，差別只在探索範圍。
+
+    mode 為 "auto" 時，有收縮階層（G.ch）且建立時量測比 Dijkstra 快才用 "ch"，否則用 "dijkstra"。
+    A* 啟發值為 TWD97 直線距離乘上全圖「權重 / 直線距離」的最小值，對 length 與
+    exposure 都可接受（admissible）且一致（consistent）。
+    整個搜尋只讀 view（G.view(weight) 的快照，沒給時在這裡取），背景更新不會換到一半。
+    """
+    view = view or G.view(weight)
+    # 快照取得之後才讀收縮階層：路網更新時收縮階層先失效，不會配上較新的快照
+    ch = G.ch.get(weight)
+    if mode == "auto":
+        # 收縮階層量測較快才用，否則用 scipy Dijkstra
+        mode = "ch" if ch is not None and ch.faster else "dijkstra"
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"未知的搜尋模式：{mode}")
+    if source == target:
+        return np.array([source]), 1
+    if mode == "ch":
+        if ch is None:
+            raise ValueError(f"尚未建立 {weight} 的收縮階層（python -m routing.build --ch）")
+        return ch.query(source, target)
+    if mode == "dijkstra":
+        return _dijkstra(view, source, target)
+    if mode == "astar":
+        return _astar(view, source, target)
+    if mode == "bidirectional":
+        return _bidirectional(view, source, target, None)
+    return _bidirectional(view, source, target, _average_potential(view, source, target))
+
+
+def search_edges(G, source, target, weight, mode="dijkstra", view=None):
+    """同 search，另外回傳路徑實際走的邊 id：(節點 id 陣列或 None, 邊 id 陣列或 None, 已定案節點數)。
+
+    各模式都在去掉重複平行邊的 CSR 上搜尋，每一步 (u, v) 只對應一條邊，直接查表即可；
+    查表用的是搜尋時的同一份快照。
+    """
+    view = view or G.view(weight)
+    path, settled = search(G, source, target, weight, mode, view)
+    if path is None:
+        return None, None, settled
+    return path, view.path_edges(path), settled
+
+
+def _dijkstra(view, source, target):
+    # scipy 單源搜尋會跑完整張圖，定案節點數即可到達的節點數
+    dist, pred = dijkstra(view.matrix, directed=True, indices=source, return_predecessors=True)
+    settled = int(np.isfinite(dist).sum())
+    if pred[target] < 0:
+        return None, settled
+    path = [target]
+    while path[-1] != source:
+        path.append(pred[path[-1]])
+    return np.array(path[::-1]), settled
+
+
+# ========== 啟發函式 ==========
+def _heuristic(view, target):
+    scale = view.heuristic_scale()
+    xs, ys = view.xy_lists()
+    tx, ty = xs[target], ys[target]
+    return lambda v: scale * math.hypot(xs[v] - tx, ys[v] - ty)
+
+
+def _average_potential(view, source, target):
+    # 雙向 A* 用的平均位能：p(v) = (h_t(v) - h_s(v)) / 2，正反兩側的縮減成本相同
+    to_target = _heuristic(view, target)
+    to_source = _heuristic(view, source)
+    return lambda v: (to_target(v) - to_source(v)) / 2
+
+
+# ========== A* ==========
+def _astar(view, source, target):
+    indptr, indices, data = view.adjacency_lists()
+    h = _heuristic(view, target)
+    dist = {source: 0.0}
+    pred = {source: -1}
+    settled = set()
+    heap = [(h(source), 0.0, source)]
+    while heap:
+        _, d, u = heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        if u == target:
+            return np.array(_chain(pred, target)[::-1]), len(settled)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + data[k]
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                pred[v] = u
+                heappush(heap, (nd + h(v), nd, v))
+    return None, len(settled)
+
+
+# ========== 雙向 Dijkstra / 雙向 A* ==========
+def _bidirectional(view, source, target, potential):
+    # 以縮減成本 w'(u, v) = w(u, v) - p(u) + p(v) 跑雙向 Dijkstra；potential 為 None 時 p = 0
+    p = potential or (lambda v: 0.0)
+    lists = (view.adjacency_lists(), view.adjacency_lists(reverse=True))
+    dist = ({source: 0.0}, {target: 0.0})
+    pred = ({source: -1}, {target: -1})
+    settled = (set(), set())
+    heaps = ([(0.0, source)], [(0.0, target)])
+    best, meet = math.inf, None
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        d, u = heappop(heaps[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+        indptr, indices, data = lists[side]
+        pu = p(u)
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            # 反向搜尋走的是原圖的 v → u，縮減成本同樣是 w - p(起點) + p(終點)
+            nd = d + (data[k] - pu + p(v) if side == 0 else data[k] - p(v) + pu)
+            if nd < dist[side].get(v, math.inf):
+                dist[side][v] = nd
+                pred[side][v] = u
+                heappush(heaps[side], (nd, v))
+                if v in dist[1 - side] and nd + dist[1 - side][v] < best:
+                    best, meet = nd + dist[1 - side][v], v
+    count = len(settled[0]) + len(settled[1])
+    if meet is None:
+        return None, count
+    path = _chain(pred[0], meet)[::-1] + _chain(pred[1], meet)[1:]
+    return np.array(path), count
+
+
+def _chain(pred, node):
+    chain = [node]
+    while pred[chain[-1]] >= 0:
+        chain.append(pred[chain[-1]])
+    return chain
@@ -0,0 +1,290 @@
+# 無 UI 的路徑服務（ASGI）：python -m routing.service [--host 0.0.0.0] [--port 8000] [--workers N]
+# 每個 worker 行程載入一次路網，路徑計算在執行緒池裡跑，不擋住事件迴圈；
+# 多個副本可放在負載平衡器後面，app.py 設定 ROUTING_SERVICE_URL 即改用這個服務
+import argparse
+import math
+import os
+from contextlib import asynccontextmanager
+
+import anyio
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from routing import metrics
+from routing.alternatives import ALTERNATIVE_ROUTES
+from routing.geometry import DEFAULT_ZOOM, route_latlon
+from routing.isochrone import ISO_METHOD, ISO_METHODS, exposure_budget
+from routing.graph import (
+    ARTIFACT_PATH,
+    PKL_PATH,
+    compute_alternatives,
+    compute_isochrone,
+    compute_isoexposure,
+    compute_pareto,
+    compute_path,
+    find_nearest_node,
+    load_graph,
+    route_geometry,
+)
+from routing.memory import memory_usage
+from routing.network import WEIGHTS
+from routing.pareto import PARETO_ROUTES
+from routing.spatial import MAX_SNAP_DIST
+from routing.stats import SPEEDS
+from routing.update import watch_updates
+
+SERVICE_THREADS = 8  # 每個行程同時計算的請求數
+MAX_BATCH = 1000  # 批次路徑每次最多幾組起訖點
+MAX_ROUTES = 10  # 權衡路徑、替代路徑每次最多幾條（k），每條都要跑數次搜尋
+MAX_ZOOM = 22  # 幾何簡化的縮放層級上限（Leaflet 最大層級）
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _param(params, name, cast, default=None, low=None, high=None):
+    # 數值參數須為有限值，並落在 [low, high]（None 表示不限）
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise BadRequest(f"缺少參數 {name}")
+        return default
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"參數 {name} 格式錯誤：{value}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise BadRequest(f"參數 {name} 必須是有限數值：{value}")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise BadRequest(f"參數 {name} 超出範圍：{value}")
+    return value
+
+
+def _node(G, params, name):
+    node = _param(params, name, int)
+    if not 0 <= node < G.num_nodes:
+        raise BadRequest(f"{name} 超出範圍：{node}")
+    return node
+
+
+def _zoom(params):
+    return _param(params, "zoom", int, DEFAULT_ZOOM, low=0, high=MAX_ZOOM)
+
+
+def _pairs(G, body):
+    # body["pairs"] 須為 [[起點, 終點], ...]，節點 id 必須是整數（不接受 1.7 或 true）
+    pairs = body.get("pairs") or []
+    if not isinstance(pairs, list):
+        raise BadRequest(f"pairs 須為起訖點串列：{pairs}")
+    if len(pairs) > MAX_BATCH:
+        raise BadRequest(f"一次最多 {MAX_BATCH} 組起訖點")
+    for pair in pairs:
+        if (not isinstance(pair, list) or len(pair) != 2
+                or not all(isinstance(p, int) and not isinstance(p, bool) for p in pair)):
+            raise BadRequest(f"起訖點格式錯誤：{pair}")
+        if not all(0 <= p < G.num_nodes for p in pair):
+            raise BadRequest(f"起訖點超出範圍：{pair}")
+    return pairs
+
+
+def _weight(params):
+    weight = params.get("weight", "length")
+    if weight not in WEIGHTS:
+        raise BadRequest(f"未知的權重：{weight}")
+    return weight
+
+
+def _mode(params):
+    mode = params.get("mode", "機車")
+    if mode not in SPEEDS:
+        raise BadRequest(f"未知的交通方式：{mode}")
+    return mode
+
+
+def _method(params):
+    method = params.get("method", ISO_METHOD)
+    if method not in ISO_METHODS:
+        raise BadRequest(f"未知的範圍計算方式：{method}")
+    return method
+
+
+# ========== 回應內容 ==========
+def route_feature(coords, properties):
+    # (lat, lon) 座標 → GeoJSON LineString（經度在前）
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": [[lon, lat] for lat, lon in coords]},
+        "properties": properties,
+    }
+
+
+def route_result(G, start, end, weight, zoom):
+    path, total, exposure = compute_path(G, start, end, weight)
+    coords = route_geometry(G, start, end, weight, zoom) if path is not None else []
+    return {"start_node": start, "end_node": end, "weight": weight, "path": path,
+            "length": total, "exposure": exposure, "coords": coords}
+
+
+def as_geojson(results):
+    features = [route_feature(r.pop("coords"), r) for r in results]
+    return {"type": "FeatureCollection", "features": features}
+
+
+# ========== 服務 ==========
+def create_app(G=None, pkl_path=PKL_PATH, artifact_path=ARTIFACT_PATH, threads=SERVICE_THREADS):
+    """建立 ASGI app；沒給 G 時在啟動時載入路網。"""
+    state = {"G": G}
+    limiter = anyio.CapacityLimiter(threads)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if state["G"] is None:
+            state["G"] = await anyio.to_thread.run_sync(load_graph, pkl_path, artifact_path)
+        # data/updates 裡新的 delta 檔由背景執行緒套用，請求不必掃描資料夾；分區載入時不套用
+        stop = None if state["G"].partitioned else watch_updates(state["G"])
+        yield
+        if stop is not None:
+            stop.set()
+
+    def run(handler, params):
+        # 啟用 metrics 時每個請求寫一筆明細
+        metrics.start_trace(handler.__name__)
+        try:
+            return handler(state["G"], params)
+        finally:
+            metrics.finish_trace()
+
+    def endpoint(handler):
+        # 解析參數後在執行緒池裡計算；參數錯誤回 400
+        async def wrapped(request):
+            params = dict(request.query_params)
+            try:
+                if request.method == "POST":
+                    try:
+                        params["body"] = await request.json()
+                    except ValueError:
+                        raise BadRequest("請求內容不是 JSON")
+                result = await anyio.to_thread.run_sync(run, handler, params, limiter=limiter)
+            except (BadRequest, ValueError) as e:
+                # 計算函式對不合理輸入丟出的 ValueError 也視為請求錯誤
+                return JSONResponse({"error": str(e)}, status_code=400)
+            return JSONResponse(result)
+        return wrapped
+
+    def health(G, params):
+        # 含本行程的載入秒數與記憶體用量，方便估計每台主機放得下幾個副本
+        return {"status": "ok", "version": G.version, "nodes": G.num_nodes, "edges": G.num_edges,
+                "pid": os.getpid(), "load_s": G.load_seconds, **memory_usage()}
+
+    def nearest(G, params):
+        lat = _param(params, "lat", float, low=-90, high=90)
+        lon = _param(params, "lon", float, low=-180, high=180)
+        max_dist = _param(params, "max_dist", float, MAX_SNAP_DIST, low=0)
+        node = find_nearest_node(G, lat, lon, max_dist)
+        if node is None:
+            return {"node": None}
+        lat, lon = G.latlon[node].tolist()
+        return {"node": node, "lat": lat, "lon": lon}
+
+    def route(G, params):
+        start, end = _node(G, params, "start"), _node(G, params, "end")
+        result = route_result(G, start, end, _weight(params), _zoom(params))
+        if params.get("format") == "geojson":
+            return as_geojson([result])
+        return result
+
+    def pareto(G, params):
+        start, end = _node(G, params, "start"), _node(G, params, "end")
+        zoom = _zoom(params)
+        routes = compute_pareto(G, start, end,
+                                _param(params, "k", int, PARETO_ROUTES, low=1, high=MAX_ROUTES))
+        results = [{"path": path, "length": total, "exposure": exposure,
+                    "coords": route_latlon(G, path, zoom)} for path, total, exposure in routes]
+        if params.get("format") == "geojson":
+            return as_geojson(results)
+        return {"routes": results}
+
+    def alternatives(G, params):
+        start, end = _node(G, params, "start"), _node(G, params, "end")
+        weight = _weight(params)
+        zoom = _zoom(params)
+        routes = compute_alternatives(G, start, end, weight,
+                                      _param(params, "k", int, ALTERNATIVE_ROUTES, low=1, high=MAX_ROUTES))
+        results = [{"path": path, "length": total, "exposure": exposure,
+                    "coords": route_latlon(G, path, zoom, G.path_edges(path, weight))}
+                   for path, total, exposure in routes]
+        if params.get("format") == "geojson":
+            return as_geojson(results)
+        return {"routes": results}
+
+    def isochrone(G, params):
+        # 從 node 出發 minutes 分鐘內可到達的範圍
+        node = _node(G, params, "node")
+        return compute_isochrone(G, node, _mode(params), _param(params, "minutes", float, low=0),
+                                 _method(params))
+
+    def isoexposure(G, params):
+        # 累積暴露量不超過 budget 的範圍；沒給 budget 時以平均濃度下 mode 走 minutes 分鐘的量
+        node = _node(G, params, "node")
+        budget = params.get("budget")
+        if budget is None:
+            budget = exposure_budget(G, _mode(params), _param(params, "minutes", float, low=0))
+        else:
+            budget = _param(params, "budget", float, low=0)
+        return {**compute_isoexposure(G, node, budget, _method(params)), "budget": budget}
+
+    def batch(G, params):
+        # body：{"pairs": [[起點, 終點], ...], "weights": [...], "geometry": false}
+        body = params["body"] if isinstance(params["body"], dict) else {}
+        pairs = _pairs(G, body)
+        weights = body.get("weights", list(WEIGHTS))
+        if not isinstance(weights, list) or any(w not in WEIGHTS for w in weights):
+            raise BadRequest(f"未知的權重：{weights}")
+        zoom = _zoom(params)
+        results = []
+        for start, end in pairs:
+            for weight in weights:
+                result = route_result(G, start, end, weight, zoom)
+                if not body.get("geometry") and params.get("format") != "geojson":
+                    del result["coords"]
+                results.append(result)
+        if params.get("format") == "geojson":
+            return as_geojson(results)
+        return {"routes": results}
+
+    async def metrics_text(request):
+        # Prometheus 抓取用；未設定 ROUTING_METRICS 時內容是空的
+        return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/health", endpoint(health)),
+        Route("/metrics", metrics_text),
+        Route("/nearest", endpoint(nearest)),
+        Route("/route", endpoint(route)),
+        Route("/pareto", endpoint(pareto)),
+        Route("/alternatives", endpoint(alternatives)),
+        Route("/isochrone", endpoint(isochrone)),
+        Route("/isoexposure", endpoint(isoexposure)),
+        Route("/routes", endpoint(batch), methods=["POST"]),
+    ], lifespan=lifespan)
+
+
+# uvicorn routing.service:app
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="啟動路徑計算 HTTP 服務")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker 行程數，各自載入路網")
+    args = parser.parse_args(argv)
+    uvicorn.run("routing.service:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
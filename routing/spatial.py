@@ -0,0 +1,53 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from routing import metrics
+from routing.projection import latlon_to_twd97
+
+# ========== 系統參數 ==========
+MAX_SNAP_DIST = 1000  # 最近節點搜尋半徑（公尺，EPSG:3826）
+REBUILD_RATIO = 0.05  # 新增節點超過主樹節點數的這個比例時，整棵樹重建
+
+
+# ========== 節點空間索引 ==========
+class NodeIndex:
+    """以 TWD97 (EPSG:3826) 公尺座標建立的 cKDTree，載入圖時建立一次。
+
+    之後新增的節點放在另一棵小樹，查詢時兩棵取較近者；小樹變大才整棵重建。
+    """
+
+    def __init__(self, xy):
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        with metrics.span("kdtree_build"):
+            self.tree = cKDTree(self.xy)
+        self.extra = None
+
+    def add(self, xy):
+        # 新節點的 id 接在現有節點之後
+        self.xy = np.concatenate([self.xy, np.asarray(xy, dtype=float).reshape(-1, 2)])
+        if len(self.xy) - self.tree.n > REBUILD_RATIO * self.tree.n:
+            self.tree = cKDTree(self.xy)
+            self.extra = None
+        else:
+            self.extra = cKDTree(self.xy[self.tree.n:])
+
+    def query(self, xy, max_dist=MAX_SNAP_DIST):
+        """以 TWD97 座標找最近節點，回傳 (節點索引, 距離公尺)；超出 max_dist 的索引為 -1。"""
+        dist, idx = self.tree.query(xy, distance_upper_bound=max_dist, workers=-1)
+        if self.extra is not None:
+            extra_dist, extra_idx = self.extra.query(xy, distance_upper_bound=max_dist)
+            closer = extra_dist < dist
+            dist = np.where(closer, extra_dist, dist)
+            idx = np.where(closer, extra_idx + self.tree.n, idx)
+        idx = np.where(np.isfinite(dist), idx, -1)
+        return idx, dist
+
+    def snap(self, lats, lons, max_dist=MAX_SNAP_DIST):
+        """批次找最近節點（WGS84 輸入），回傳值同 query。"""
+        return self.query(latlon_to_twd97(lats, lons), max_dist)
+
+    def nearest(self, lat, lon, max_dist=MAX_SNAP_DIST):
+        idx, _ = self.snap(lat, lon, max_dist)
+        if idx[0] < 0:
+            return None
+        return int(idx[0])
@@ -0,0 +1,22 @@
+import numpy as np
+
+# ========== 交通方式速度（km/h）==========
+SPEEDS = {"機車": 45, "單車": 18, "步行": 5}
+
+
+# ========== 路徑統計 ==========
+def route_stats(dist_m, exposure, speed):
+    """回傳 (距離 km, 預估時間 min, 每分鐘暴露量)；純量或 NumPy 陣列皆可。"""
+    dist_km = np.asarray(dist_m, dtype=float) / 1000
+    time_min = dist_km / speed * 60
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(time_min > 0, np.asarray(exposure, dtype=float) / time_min, 0.0)
+    return dist_km, time_min, rate
+
+
+def improvement_rate(rate_shortest, rate_lowest):
+    # 最低暴露路徑相對最短路徑的每分鐘暴露量改善（%），無法計算時為 NaN
+    rate_shortest = np.asarray(rate_shortest, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rate_shortest > 0,
+                        (rate_shortest - rate_lowest) / rate_shortest * 100, np.nan)
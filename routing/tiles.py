@@ -0,0 +1,97 @@
+# 把 PM2.5 疊圖切成 z/x/y 圖磚：python -m routing.tiles [png] [輸出資料夾]
+import base64
+import math
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from routing.projection import TWD97, WGS84, bounds_to_latlon, get_transformer
+
+# ========== 系統參數 ==========
+PM25_PNG_PATH = r"data/PM25_大台北2.png"
+PM25_EXTENT_TWD97 = (278422.218791, 2729604.773102, 351672.218791, 2799454.773102)  # 左、下、右、上
+# Streamlit 開啟 enableStaticServing 後，static/ 底下的檔案會掛在 /app/static/
+PM25_TILE_DIR = r"static/pm25_tiles"
+PM25_TILE_URL = "/app/static/pm25_tiles/{z}/{x}/{y}.png"
+TILE_SIZE = 256
+MIN_ZOOM = 8
+MAX_ZOOM = 12  # 原圖約 50 公尺/像素，z12 約 35 公尺/像素，更大的層級交給 Leaflet 放大
+
+
+# ========== 圖磚座標 ==========
+def lonlat_to_tile(lon, lat, zoom):
+    # Web Mercator 圖磚座標（含小數）
+    n = 2 ** zoom
+    x = (lon + 180) / 360 * n
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    return x, y
+
+
+def tile_range(extent, zoom):
+    (south, west), (north, east) = bounds_to_latlon(*extent)
+    x0, y0 = lonlat_to_tile(west, north, zoom)
+    x1, y1 = lonlat_to_tile(east, south, zoom)
+    return range(int(x0), int(x1) + 1), range(int(y0), int(y1) + 1)
+
+
+# ========== 切圖 ==========
+def render_tile(raster, extent, zoom, x, y):
+    """以最近鄰取樣把 TWD97 範圍的影像重投影成一張 Web Mercator 圖磚，全透明時回傳 None。"""
+    n = TILE_SIZE * 2 ** zoom
+    px = (x * TILE_SIZE + np.arange(TILE_SIZE) + 0.5) / n
+    py = (y * TILE_SIZE + np.arange(TILE_SIZE) + 0.5) / n
+    lon = px * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py))))
+    lon, lat = np.meshgrid(lon, lat)
+    tx, ty = get_transformer(WGS84, TWD97).transform(lon.ravel(), lat.ravel())
+
+    left, bottom, right, top = extent
+    height, width = raster.shape[:2]
+    col = np.floor((tx - left) / (right - left) * width).astype(int)
+    row = np.floor((top - ty) / (top - bottom) * height).astype(int)
+    inside = (col >= 0) & (col < width) & (row >= 0) & (row < height)
+    if not inside.any():
+        return None
+
+    tile = np.zeros((TILE_SIZE * TILE_SIZE, 4), dtype=np.uint8)
+    tile[inside] = raster[row[inside], col[inside]]
+    if not tile[:, 3].any():
+        return None
+    return tile.reshape(TILE_SIZE, TILE_SIZE, 4)
+
+
+def build_tiles(png_path=PM25_PNG_PATH, out_dir=PM25_TILE_DIR, extent=PM25_EXTENT_TWD97,
+                zooms=range(MIN_ZOOM, MAX_ZOOM + 1)):
+    from PIL import Image
+
+    raster = np.asarray(Image.open(png_path).convert("RGBA"))
+    count = 0
+    for z in zooms:
+        xs, ys = tile_range(extent, z)
+        for x in xs:
+            for y in ys:
+                tile = render_tile(raster, extent, z, x, y)
+                if tile is None:
+                    continue
+                os.makedirs(os.path.join(out_dir, str(z), str(x)), exist_ok=True)
+                Image.fromarray(tile, "RGBA").save(
+                    os.path.join(out_dir, str(z), str(x), f"{y}.png"), optimize=True
+                )
+                count += 1
+    return count
+
+
+# ========== 沒有圖磚時的備援 ==========
+@lru_cache(maxsize=4)
+def png_data_url(png_path=PM25_PNG_PATH):
+    # 整張 PNG 只讀取、編碼一次
+    with open(png_path, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode("utf-8")
+
+
+if __name__ == "__main__":
+    png = sys.argv[1] if len(sys.argv) > 1 else PM25_PNG_PATH
+    out = sys.argv[2] if len(sys.argv) > 2 else PM25_TILE_DIR
+    print(f"✅ {out}：{build_tiles(png, out)} 張圖磚")
@@ -0,0 +1,176 @@
+# 路網增量更新：python -m routing.update delta.json [--pkl ...] 試套用並列出變更
+# delta 檔為 JSON，節點以 TWD97 座標 [x, y] 指定（與原始 pickle 的節點鍵相同），
+# 邊以兩端座標 {"u": [x, y], "v": [x, y]}（兩點間所有平行邊）或邊 id {"edge": 123} 指定：
+# {
+#   "add_nodes": [[x, y], ...],
+#   "add_edges": [{"u": [x, y], "v": [x, y], "length": 85.2, "exposure": 20.1,
+#                  "geometry": [[lon, lat], ...]}],   # geometry 可省略；不存在的端點自動新增
+#   "patch": [{"u": [x, y], "v": [x, y], "exposure": 12.3}],
+#   "close": [{"u": [x, y], "v": [x, y]}, {"edge": 123}],
+#   "reopen": [{"edge": 123}]
+# }
+# 執行中的 app 與路徑服務以背景執行緒（watch_updates）定期套用 UPDATE_DIR 裡尚未套用的 delta 檔
+# （依檔名排序），請求本身不會掃描資料夾
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from routing.graph import ARTIFACT_PATH, PKL_PATH, load_graph
+from routing.network import WEIGHTS
+
+UPDATE_DIR = r"data/updates"
+NODE_TOLERANCE = 0.01  # 座標比對節點的容許誤差（公尺）
+WATCH_INTERVAL = 10  # 背景檢查新 delta 檔的間隔（秒）
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+
+
+# ========== 對應節點與邊 ==========
+def resolve_nodes(G, coords, create=False):
+    """TWD97 座標 → 節點 id；找不到時 create=True 就新增節點，否則丟出 ValueError。"""
+    xy = np.asarray(coords, dtype=float).reshape(-1, 2)
+    idx, _ = G.index.query(xy, NODE_TOLERANCE)
+    missing = np.flatnonzero(idx < 0)
+    if len(missing) and not create:
+        raise ValueError(f"找不到節點：{xy[missing].tolist()}")
+    if len(missing):
+        # 同一批裡重複的新座標只新增一次
+        new_xy, inverse = np.unique(xy[missing], axis=0, return_inverse=True)
+        idx[missing] = G.add_nodes(new_xy)[inverse.ravel()]
+    return idx
+
+
+def resolve_edges(G, refs):
+    # 每個 ref 為 {"edge": id} 或 {"u": [x, y], "v": [x, y]}，回傳 (ref 序號, 邊 id) 兩個陣列
+    owner, edges = [], []
+    for i, ref in enumerate(refs):
+        if "edge" in ref:
+            found = np.array([ref["edge"]])
+            if not 0 <= found[0] < G.num_edges:
+                raise ValueError(f"邊 id 超出範圍：{ref['edge']}")
+        else:
+            a, b = resolve_nodes(G, [ref["u"], ref["v"]])
+            # 含已封閉的邊，重新開放時才找得到
+            indptr, indices, eid = G.adjacency
+            row = slice(indptr[a], indptr[a + 1])
+            found = eid[row][indices[row] == b]
+            if len(found) == 0:
+                raise ValueError(f"{ref['u']} → {ref['v']} 之間沒有邊")
+        owner.extend([i] * len(found))
+        edges.extend(found.tolist())
+    return np.array(owner, dtype=np.int64), np.array(edges, dtype=np.int64)
+
+
+# ========== 套用 ==========
+def load_delta(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def apply_delta(G, delta):
+    """依 新增節點 → 新增邊 → 修改屬性 → 封閉 → 重新開放 的順序套用，回傳各項筆數。
+
+    每一步都會讓快取與衍生結構失效並遞增 G.version；KD 樹只加入新節點。
+    """
+    summary = {}
+    if delta.get("add_nodes"):
+        summary["add_nodes"] = len(resolve_nodes(G, delta["add_nodes"], create=True))
+    if delta.get("add_edges"):
+        items = delta["add_edges"]
+        for item in items:
+            missing = [k for k in ("u", "v", "length", "exposure") if k not in item]
+            if missing:
+                raise ValueError(f"新增的邊缺少欄位：{missing}")
+        ends = resolve_nodes(G, [p for item in items for p in (item["u"], item["v"])],
+                             create=True)
+        G.add_edges(ends[0::2], ends[1::2],
+                    [item["length"] for item in items],
+                    [item["exposure"] for item in items],
+                    [item.get("geometry") for item in items])
+        summary["add_edges"] = len(items)
+    if delta.get("patch"):
+        refs = delta["patch"]
+        owner, edges = resolve_edges(G, refs)
+        for weight in WEIGHTS:
+            has = np.array([weight in refs[i] for i in owner], dtype=bool)
+            if has.any():
+                G.patch_edges(edges[has], weight, [refs[i][weight] for i in owner[has]])
+        summary["patch"] = len(edges)
+    for key, closed in (("close", True), ("reopen", False)):
+        if delta.get(key):
+            _, edges = resolve_edges(G, delta[key])
+            G.close_edges(edges, closed)
+            summary[key] = len(edges)
+    return summary
+
+
+def apply_updates(G, update_dir=UPDATE_DIR, failed=None):
+    """套用 update_dir 裡還沒套用過的 delta 檔，回傳這次套用的檔名。
+
+    已套用的檔名記在 G.applied_updates；以鎖避免重複套用。給 failed（set）時格式錯誤的檔
+    記進去並略過，不丟出例外。
+    """
+    if not os.path.isdir(update_dir):
+        return []
+    applied = []
+    with _lock:
+        names = sorted(n for n in os.listdir(update_dir) if n.endswith(".json")
+                       and n not in G.applied_updates and n not in (failed or ()))
+        for name in names:
+            try:
+                apply_delta(G, load_delta(os.path.join(update_dir, name)))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                if failed is None:
+                    raise
+                failed.add(name)
+                logger.warning("delta 檔 %s 套用失敗：%s", name, e)
+                continue
+            G.applied_updates.add(name)
+            applied.append(name)
+    return applied
+
+
+def watch_updates(G, update_dir=UPDATE_DIR, interval=WATCH_INTERVAL):
+    """啟動背景執行緒，每 interval 秒套用一次新的 delta 檔；回傳 threading.Event，set() 即停止。
+
+    套用時路網的衍生結構是整個換掉而不是原地清空，進行中的搜尋仍讀舊的那份。
+    """
+    stop = threading.Event()
+    failed = set()
+
+    def loop():
+        while True:
+            applied = apply_updates(G, update_dir, failed)
+            if applied:
+                logger.info("已套用 delta 檔 %s，路網版本 %d", applied, G.version)
+            if stop.wait(interval):
+                return
+
+    threading.Thread(target=loop, name="routing-updates", daemon=True).start()
+    return stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在載入的路網上試套用 delta 檔並計時")
+    parser.add_argument("deltas", nargs="+")
+    parser.add_argument("--pkl", default=PKL_PATH)
+    parser.add_argument("--artifact", default=ARTIFACT_PATH)
+    args = parser.parse_args(argv)
+
+    G = load_graph(args.pkl, args.artifact)
+    for path in args.deltas:
+        t0 = time.perf_counter()
+        summary = apply_delta(G, load_delta(path))
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{path}：{summary}，{elapsed:.1f} ms，版本 {G.version}")
+    print(f"✅ {G.num_nodes} 個節點、{G.num_edges} 條邊、{int(G.closed.sum())} 條封閉")
+
+
+if __name__ == "__main__":
+    main()
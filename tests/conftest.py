@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from routing.network import RoadNetwork
+
+# 台北附近的 TWD97 座標，格點間距 100 公尺
+ORIGIN = (300000.0, 2770000.0)
+STEP = 100.0
+
+
+def grid_network(n=12, seed=0, drop=0.1):
+    """n × n 格狀無向路網，隨機拿掉部分邊；length 略大於直線距離，exposure 隨機。"""
+    rng = np.random.default_rng(seed)
+    i, j = np.divmod(np.arange(n * n), n)
+    xy = np.column_stack([ORIGIN[0] + j * STEP, ORIGIN[1] + i * STEP])
+    right = np.flatnonzero(j < n - 1)
+    up = np.flatnonzero(i < n - 1)
+    u = np.concatenate([right, up])
+    v = np.concatenate([right + 1, up + n])
+    keep = rng.random(len(u)) >= drop
+    u, v = u[keep], v[keep]
+    length = STEP * rng.uniform(1.0, 1.3, len(u))
+    exposure = length * rng.uniform(0.005, 0.05, len(u))
+    return RoadNetwork(xy, u, v, length, exposure)
+
+
+@pytest.fixture
+def network():
+    return grid_network()
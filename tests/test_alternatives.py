@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from routing.alternatives import alternative_routes
+from routing.graph import compute_path
+from routing.network import WEIGHTS
+
+
+@pytest.mark.parametrize("weight", WEIGHTS)
+def test_alternatives_are_sorted_by_cost(network, weight):
+    rnd = random.Random(0)
+    column = 1 if weight == "length" else 2
+    for _ in range(30):
+        s, t = rnd.sample(range(network.num_nodes), 2)
+        routes = alternative_routes(network, s, t, weight, k=4)
+        best = compute_path(network, s, t, weight, "dijkstra")
+        if best[0] is None:
+            assert routes == []
+            continue
+        costs = [r[column] for r in routes]
+        assert costs == sorted(costs)
+        assert costs[0] == pytest.approx(best[column])
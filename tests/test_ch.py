@@ -0,0 +1,52 @@
+import random
+
+import numpy as np
+import pytest
+
+from routing.ch import ContractionHierarchy, build_ch
+from routing.network import WEIGHTS
+from routing.search import search
+
+
+def path_cost(G, path, weight):
+    return G.weight_array(weight)[G.csr_edges(weight, path[:-1], path[1:])].sum()
+
+
+@pytest.mark.parametrize("weight", WEIGHTS)
+def test_costs_match_dijkstra_on_random_pairs(network, weight):
+    ch = build_ch(network, weight)
+    rnd = random.Random(0)
+    for _ in range(200):
+        s, t = rnd.sample(range(network.num_nodes), 2)
+        expected, _ = search(network, s, t, weight, "dijkstra")
+        got, _ = ch.query(s, t)
+        assert (got is None) == (expected is None)
+        if expected is None:
+            continue
+        # 展開後的路徑必須從 s 到 t、每一步都是原圖的邊
+        assert got[0] == s and got[-1] == t
+        assert path_cost(network, got, weight) == pytest.approx(path_cost(network, expected, weight))
+
+
+def test_save_and_load_keep_speedup(network, tmp_path):
+    ch = build_ch(network, "length")
+    ch.speedup = 3.0
+    ch.save(tmp_path)
+    loaded = ContractionHierarchy.load(tmp_path)
+    assert loaded.speedup == 3.0 and loaded.faster
+    assert np.array_equal(loaded.rank, ch.rank)
+
+
+def test_auto_prefers_ch_only_when_measured_faster(network):
+    ch = network.ch["length"] = build_ch(network, "length")
+    calls = []
+    query = ch.query
+    ch.query = lambda s, t: calls.append((s, t)) or query(s, t)
+
+    ch.speedup = 0.5
+    search(network, 0, network.num_nodes - 1, "length", "auto")
+    assert calls == []
+
+    ch.speedup = 5.0
+    search(network, 0, network.num_nodes - 1, "length", "auto")
+    assert calls == [(0, network.num_nodes - 1)]
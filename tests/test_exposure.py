@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from routing.exposure import HourlyExposure
+
+
+def test_calibrated_scale_keeps_exposure_units(network):
+    base = network.exposure.copy()
+    extent = (*network.xy.min(axis=0) - 50, *network.xy.max(axis=0) + 50)
+    grids = np.stack([np.full((8, 8), 20.0), np.full((8, 8), 40.0)])
+    hourly = HourlyExposure(network, grids, extent, hours=["08", "09"])
+    hourly.apply("08")
+    # 平均濃度（30）算出的總量對齊原本的 exposure，20 的時段為其 2/3
+    assert network.exposure.sum() == pytest.approx(base.sum() * 2 / 3)
+    hourly.apply("09")
+    assert network.exposure.sum() == pytest.approx(base.sum() * 4 / 3)
+
+
+def test_explicit_scale_is_used_as_is(network):
+    extent = (*network.xy.min(axis=0) - 50, *network.xy.max(axis=0) + 50)
+    hourly = HourlyExposure(network, np.full((4, 4), 10.0), extent, scale=1.0)
+    # 未校準時暴露量為 length × 濃度
+    assert hourly.exposure(0) == pytest.approx(network.length * 10)
@@ -0,0 +1,147 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from routing import geocode, metrics
+from routing.geocode import Gazetteer, GeocodeCache, GeocodeError, Geocoder
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+from mock_geocoder import MockGeocoder, fake_location  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    server = MockGeocoder().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 可手動前進的 time.time，測試 TTL 與最後使用時間
+    now = [1000.0]
+    monkeypatch.setattr(geocode.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer(["臺北市中正區重慶南路一段122號", "台北市大安區羅斯福路四段1號",
+                      "新北市板橋區中山路一段161號"],
+                     [25.0401, 25.0173, 25.0119], [121.5119, 121.5397, 121.4647])
+
+
+# ========== Geocoder ==========
+def test_geocode_uses_api_once_then_cache(server, tmp_path):
+    geocoder = Geocoder(server.url, "key", cache=GeocodeCache(str(tmp_path / "c.sqlite")))
+    first = geocoder.geocode("台北市信義區市府路1號")
+    # 全形、空白與「臺」正規化後為同一個鍵，不再打 API
+    again = geocoder.geocode("臺北市 信義區市府路１號")
+    assert first == again == fake_location("台灣 台北市信義區市府路1號")
+    assert server.requests == 1
+
+
+def test_reverse_geocode_caches_rounded_coordinates(server, tmp_path):
+    geocoder = Geocoder(server.url, "key", cache=GeocodeCache(str(tmp_path / "c.sqlite")))
+    address = geocoder.reverse_geocode(25.0330001, 121.5654001)
+    assert address == geocoder.reverse_geocode(25.0330002, 121.5654002)
+    assert address.startswith("模擬地址") and server.requests == 1
+
+
+def test_geocode_error_is_not_cached(server, tmp_path):
+    server.missing.add("不存在的路")
+    geocoder = Geocoder(server.url, "key", cache=GeocodeCache(str(tmp_path / "c.sqlite")))
+    for _ in range(2):
+        with pytest.raises(GeocodeError):
+            geocoder.geocode("不存在的路1號")
+    assert server.requests == 2
+
+
+def test_gazetteer_answers_before_api(server, gazetteer):
+    geocoder = Geocoder(server.url, "key", gazetteer=gazetteer)
+    assert geocoder.geocode("台北市中正區重慶南路1段122號") == (25.0401, 121.5119)
+    assert geocoder.reverse_geocode(25.0401, 121.5119) == gazetteer.addresses[0]
+    assert server.requests == 0
+
+
+def test_async_lookups_run_concurrently(tmp_path):
+    server = MockGeocoder(delay=0.3).start()
+    try:
+        geocoder = Geocoder(server.url, "key")
+        t0 = time.perf_counter()
+        futures = [geocoder.geocode_async(a) for a in ("甲路1號", "乙路2號")]
+        results = [f.result(timeout=5) for f in futures]
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.stop()
+    assert len(set(results)) == 2 and server.requests == 2
+    # 依序查詢至少 0.6 秒
+    assert elapsed < 0.55
+
+
+def test_async_lookups_record_into_callers_trace(server, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    geocoder = Geocoder(server.url, "key")
+    metrics.start_trace("geocode")
+    try:
+        geocoder.geocode_async("甲路1號").result(timeout=5)
+        geocoder.reverse_geocode_async(25.03, 121.56).result(timeout=5)
+    finally:
+        trace = metrics.finish_trace()
+    names = [name for name, _ in trace["spans"]]
+    assert "geocode_api" in names and "reverse_geocode_api" in names
+    assert trace["counters"]["geocode_api_requests"] == 2
+
+
+# ========== GeocodeCache ==========
+def test_cache_entries_expire_after_ttl(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / "c.sqlite"), ttl=60)
+    cache.set("a", [1, 2])
+    clock[0] += 59
+    assert cache.get("a") == [1, 2]
+    clock[0] += 2
+    assert cache.get("a") is None
+
+
+def test_cache_evicts_least_recently_used_in_batches(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / "c.sqlite"), maxsize=10, evict_ratio=0.3)
+    for i in range(10):
+        clock[0] += 1
+        cache.set(f"k{i}", i)
+    clock[0] += 1
+    assert cache.get("k0") == 0  # k0 剛用過，不會被淘汰
+    clock[0] += 1
+    cache.set("k10", 10)
+    # 超過上限後一次淘汰到 7 筆：最久沒用到的 k1～k4 被刪
+    assert len(cache) == 7
+    assert [cache.get(f"k{i}") for i in range(1, 5)] == [None] * 4
+    assert cache.get("k0") == 0 and cache.get("k10") == 10
+
+
+def test_cache_is_shared_across_instances(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    GeocodeCache(path).set("a", "台北")
+    assert GeocodeCache(path).get("a") == "台北"
+
+
+# ========== Gazetteer ==========
+def test_gazetteer_exact_match_after_normalization(gazetteer):
+    assert gazetteer.lookup("臺北市大安區羅斯福路4段１號") == (25.0173, 121.5397)
+
+
+def test_gazetteer_fuzzy_match(gazetteer):
+    # 少了「區」字仍夠像
+    assert gazetteer.lookup("新北市板橋中山路一段161號") == (25.0119, 121.4647)
+
+
+def test_gazetteer_fuzzy_match_keeps_house_number(gazetteer):
+    # 只差門牌號碼時不能當成同一個地址
+    assert gazetteer.lookup("新北市板橋區中山路一段163號") is None
+
+
+def test_gazetteer_prefix_and_reverse(gazetteer):
+    assert gazetteer.suggest("台北市") == gazetteer.addresses[:2]
+    assert gazetteer.reverse(25.0119, 121.4647) == gazetteer.addresses[2]
+    assert gazetteer.reverse(25.2, 121.6) is None
@@ -0,0 +1,25 @@
+import math
+
+import pytest
+
+from routing.isochrone import exposure_budget, isochrone, isoexposure, reachable_area
+
+
+@pytest.mark.parametrize("budget", [-1.0, math.nan, math.inf])
+def test_invalid_budget_is_rejected(network, budget):
+    with pytest.raises(ValueError):
+        reachable_area(network, 0, "length", budget)
+
+
+@pytest.mark.parametrize("minutes", [-5, math.nan])
+def test_invalid_minutes_are_rejected(network, minutes):
+    with pytest.raises(ValueError):
+        isochrone(network, 0, "步行", minutes)
+    with pytest.raises(ValueError):
+        exposure_budget(network, "步行", minutes)
+
+
+def test_area_grows_with_budget(network):
+    areas = [isochrone(network, 0, "步行", m)["area_km2"] for m in (0, 5, 10)]
+    assert areas[0] < areas[1] < areas[2]
+    assert isoexposure(network, 0, exposure_budget(network, "步行", 5))["nodes"] > 1
@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import pytest
+
+import routing
+from routing.network import WEIGHTS
+from routing.partition import build_partitions
+from routing.projection import twd97_to_latlon
+
+from tests.conftest import ORIGIN, STEP
+
+CELL = 300  # 12 × 12 格點切成 4 × 4 個分區
+
+
+@pytest.fixture
+def partitioned(network, tmp_path):
+    build_partitions(network, str(tmp_path), CELL)
+    return routing.load_graph(partition_path=str(tmp_path))
+
+
+@pytest.mark.parametrize("weight", WEIGHTS)
+def test_paths_match_whole_graph(network, partitioned, weight):
+    rnd = random.Random(0)
+    for _ in range(100):
+        s, t = rnd.sample(range(network.num_nodes), 2)
+        expected = routing.compute_path(network, s, t, weight)
+        got = routing.compute_path(partitioned, s, t, weight)
+        assert (got[0] is None) == (expected[0] is None)
+        if expected[0] is None:
+            continue
+        assert got[0][0] == s and got[0][-1] == t
+        assert got[1:] == pytest.approx(expected[1:])
+        assert partitioned.route_totals(s, t, weight) == pytest.approx(expected[1:])
+        # 每一步都是原圖的邊，總量與原圖加總一致
+        assert network.path_totals(got[0], weight) == pytest.approx(got[1:])
+
+
+def test_geometry_matches_whole_graph(network, partitioned):
+    s, t = 0, network.num_nodes - 1
+    path = routing.compute_path(partitioned, s, t, "length")[0]
+    assert path == routing.compute_path(network, s, t, "length")[0]
+    assert (routing.route_geometry(partitioned, s, t, "length")
+            == routing.route_geometry(network, s, t, "length"))
+
+
+def test_nearest_searches_beyond_one_cell(network, partitioned):
+    # 查詢點在路網外超過一個分區邊長，max_dist 夠大時仍要找到
+    for dx, dy in ((-2.5 * CELL, 0), (0, -4 * CELL), (1800, 1800), (30, 60)):
+        lat, lon = twd97_to_latlon(np.array([[ORIGIN[0] + dx, ORIGIN[1] + dy]]))[0]
+        for max_dist in (STEP, 2 * CELL, 10 * CELL):
+            expected = routing.find_nearest_node(network, lat, lon, max_dist)
+            assert routing.find_nearest_node(partitioned, lat, lon, max_dist) == expected
+
+
+def test_whole_graph_features_are_rejected(partitioned):
+    with pytest.raises(ValueError):
+        routing.compute_pareto(partitioned, 0, 1)
+    with pytest.raises(ValueError):
+        routing.compute_isoexposure(partitioned, 0, 1.0)
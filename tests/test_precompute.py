@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from routing import precompute
+from routing.artifact import save_artifact
+from tests.conftest import grid_network
+
+OUTPUTS = ("edge_usage_shortest", "edge_usage_lowexp", "zone_pair_count", "zone_pair_improve_sum")
+
+
+class Interrupt(np.ndarray):
+    # 加總到這個陣列時模擬 Ctrl-C
+    def __array_ufunc__(self, *args, **kwargs):
+        raise KeyboardInterrupt
+
+
+def run(out_dir, artifact):
+    precompute.run_precompute(str(out_dir), targets=20, zone_size=300, workers=1, chunk_size=16,
+                              artifact_path=str(artifact))
+    return [np.load(os.path.join(out_dir, f"{name}.npy")) for name in OUTPUTS]
+
+
+def test_resume_after_interrupt_does_not_double_count(tmp_path, monkeypatch):
+    artifact = tmp_path / "artifact"
+    save_artifact(grid_network(), str(artifact))
+    expected = run(tmp_path / "full", artifact)
+
+    # 第二批加到一半時中斷：前幾項統計已加上、後面的還沒
+    original = precompute.process_sources
+    calls = []
+
+    def interrupted(*args):
+        part = original(*args)
+        calls.append(1)
+        if len(calls) == 2:
+            part["pair_count"] = part["pair_count"].view(Interrupt)
+        return part
+
+    monkeypatch.setattr(precompute, "process_sources", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path / "resumed", artifact)
+    monkeypatch.setattr(precompute, "process_sources", original)
+    for got, want in zip(run(tmp_path / "resumed", artifact), expected):
+        assert np.allclose(got, want)
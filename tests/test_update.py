@@ -0,0 +1,134 @@
+import json
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from routing.graph import compute_path, route_geometry
+from routing.update import apply_delta, watch_updates
+from tests.conftest import grid_network
+
+FAR = 1e9  # 新增邊的長度與暴露量，遠大於任何最短路徑，不會改變答案
+
+
+def test_searches_survive_concurrent_updates(network):
+    # 縮短執行緒切換間隔，讓搜尋與更新盡量交錯
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    errors = []
+    stop = threading.Event()
+
+    def searcher(mode):
+        n = network.num_nodes
+        i = 0
+        while not stop.is_set():
+            try:
+                compute_path(network, i % n, (i * 7 + 3) % n, "length", mode)
+                compute_path(network, (i * 5) % n, (i * 3 + 1) % n, "exposure", mode)
+            except Exception as e:
+                errors.append(e)
+                return
+            i += 1
+
+    threads = [threading.Thread(target=searcher, args=(mode,))
+               for mode in ("dijkstra", "astar", "bidirectional_astar")]
+    for t in threads:
+        t.start()
+    try:
+        deadline = time.monotonic() + 0.5
+        k = 0
+        while time.monotonic() < deadline and not errors:
+            # 反覆封閉、重新開放與修改權重，每次都讓衍生結構失效
+            edge = k % network.num_edges
+            apply_delta(network, {"close": [{"edge": edge}]})
+            apply_delta(network, {"reopen": [{"edge": edge}]})
+            apply_delta(network, {"patch": [{"edge": edge, "exposure": 1.0 + k}]})
+            k += 1
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+
+def test_paths_stay_correct_while_nodes_and_edges_are_added(network):
+    # 更新只加入死路節點、極長的平行邊，並封閉/修改這些新邊：最短路徑與成本都不該改變
+    expected_net = grid_network()
+    rnd = random.Random(0)
+    pairs = [tuple(rnd.sample(range(network.num_nodes), 2)) for _ in range(40)]
+    expected = {(s, t, w): compute_path(expected_net, s, t, w, "dijkstra")[1:]
+                for s, t in pairs for w in ("length", "exposure")}
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    failures = []
+    stop = threading.Event()
+
+    def searcher(mode):
+        i = 0
+        while not stop.is_set():
+            s, t = pairs[i % len(pairs)]
+            weight = ("length", "exposure")[i % 2]
+            try:
+                path, total, exposure = compute_path(network, s, t, weight, mode)
+                route_geometry(network, s, t, weight)
+            except Exception as e:
+                failures.append(repr(e))
+                return
+            want = expected[(s, t, weight)]
+            if path is None:
+                if want != (0, 0):
+                    failures.append(f"{mode} {s}→{t} {weight}：找不到路徑")
+            elif (path[0], path[-1]) != (s, t) or (total, exposure) != pytest.approx(want):
+                failures.append(f"{mode} {s}→{t} {weight}：{(total, exposure)} ≠ {want}")
+            i += 1
+
+    threads = [threading.Thread(target=searcher, args=(mode,))
+               for mode in ("dijkstra", "astar", "bidirectional_astar")]
+    for t in threads:
+        t.start()
+    try:
+        deadline = time.monotonic() + 0.5
+        k = 0
+        while time.monotonic() < deadline and not failures:
+            u, v = int(network.u[k % 50]), int(network.v[k % 50])
+            node = network.add_nodes([[-1e4 - k, -1e4]])[0]
+            new = network.add_edges([u, node], [v, u], [FAR, FAR], [FAR, FAR])
+            network.patch_edges(new, "exposure", [2 * FAR, 2 * FAR])
+            network.close_edges(new[:1])
+            k += 1
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        sys.setswitchinterval(interval)
+    assert failures == []
+    assert k > 0
+
+
+def test_lookup_of_missing_edge_raises(network):
+    # 兩點之間沒有邊時不可回傳相鄰位置的邊 id
+    a, b = 0, network.num_nodes - 1
+    with pytest.raises(KeyError):
+        network.csr_edges("length", [a], [b])
+    # 格狀路網沒有平行邊，每條邊查回自己
+    edges = np.arange(5)
+    assert np.array_equal(network.csr_edges("length", network.u[edges], network.v[edges]), edges)
+
+
+def test_watcher_applies_new_delta_files(network, tmp_path):
+    stop = watch_updates(network, str(tmp_path), interval=0.05)
+    try:
+        (tmp_path / "bad.json").write_text("{", encoding="utf-8")
+        (tmp_path / "001.json").write_text(json.dumps({"close": [{"edge": 0}]}), encoding="utf-8")
+        deadline = time.monotonic() + 5
+        while "001.json" not in network.applied_updates and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+    assert network.closed[0]
+    # 格式錯誤的檔只略過，不會擋住其他檔，也不會被記成已套用
+    assert "bad.json" not in network.applied_updates